@@ -1,30 +1,87 @@
 from flask import Flask
 from flask_cors import CORS
-from flask_migrate import Migrate  # Import Flask-Migrate
-from app.config import Config
+from app.config import Config, engine_options
+from app.json_provider import FastJSONProvider
 
 def create_app(test_config=None):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     CORS(app)
     app.config.from_object(Config)
     
     if test_config:
         app.config.update(test_config)
+        # Pool settings depend on the backend, so rebuild them for an overridden URI
+        if 'SQLALCHEMY_DATABASE_URI' in test_config and 'SQLALCHEMY_ENGINE_OPTIONS' not in test_config:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(test_config['SQLALCHEMY_DATABASE_URI'])
          
     # Import db here to avoid circular import
     from app.models import db
     db.init_app(app)  # Initialize db here
 
-    # Initialize Flask-Migrate
-    migrate = Migrate(app, db)
-
+    from sqlalchemy import event
+    from app.models import enable_sqlite_foreign_keys
     with app.app_context():
-        db.create_all()
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', enable_sqlite_foreign_keys)
+
+    from app.cache import cache
+    cache.init_app(app)
+
+    from app.idempotency import idempotency
+    idempotency.init_app(app)
+
+    from app.jobs import jobs
+    jobs.init_app(app)
+
+    if app.config['METRICS_ENABLED']:
+        from app.metrics import init_metrics
+        init_metrics(app)
+
+    if app.config['COMPRESS_ENABLED']:
+        from app.compression import init_compression
+        init_compression(app)
+
+    # Registers the search index DDL that create_all emits with the clients table
+    from app import search  # noqa: F401
+
+    if app.config['DB_CREATE_ALL']:
+        with app.app_context():
+            db.create_all()
+            # Don't hand pooled connections to workers forked from a --preload master.
+            # An in-memory SQLite database lives only as long as its one connection.
+            for engine in db.engines.values():
+                if engine.url.get_backend_name() == 'sqlite' and engine.url.database in (None, '', ':memory:'):
+                    continue
+                engine.dispose()
 
     # Register blueprints
     from .routes.program_routes import program_bp
     from .routes.client_routes import client_bp
+    from .routes.enrollment_routes import enrollment_bp
+    from .routes.health_routes import health_bp
+    from .routes.export_routes import export_bp
+    from .routes.stats_routes import stats_bp
+    from .routes.sync_routes import sync_bp
+    from .routes.job_routes import job_bp
+    from .routes.batch_routes import batch_bp
     app.register_blueprint(program_bp)
     app.register_blueprint(client_bp)
+    app.register_blueprint(enrollment_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(job_bp)
+    app.register_blueprint(batch_bp)
+
+    # Job types register themselves with the queue on import
+    from app import tasks  # noqa: F401
+
+    from app.commands import db_command, find_duplicates_command, init_db_command
+    app.cli.add_command(db_command)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(find_duplicates_command)
 
     return app
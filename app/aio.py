@@ -0,0 +1,287 @@
+"""Optional ASGI deployment mode.
+
+Hot read routes are served natively on SQLAlchemy's asyncio engine (asyncpg
+on Postgres, aiosqlite locally) using the same statements, serializers and
+response cache as the blueprints. Every other request is handed to the Flask
+app through asgiref's WSGI adapter, so writes keep their sync code path.
+
+Native handlers run inside a Flask request context for the matched view:
+``preprocess_request`` and ``process_response`` apply the same before/after
+request hooks (CORS, metrics, compression, replica routing) as the WSGI path,
+and list routes carry the same version ETags as their ``@conditional`` views.
+
+Response cache calls run on the event loop for in-memory backends and in a
+worker thread for backends that declare ``blocking`` (e.g. a networked store).
+
+Requires ``asgiref`` plus an async driver; run with e.g. ``uvicorn asgi:app``.
+"""
+import asyncio
+import io
+import re
+import sys
+from urllib.parse import parse_qs
+from flask import jsonify, request
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app import create_app, queries
+from app.cache import PROGRAM_LIST_KEY, ResponseCache, cache_entry
+from app.conditional import version_query, weak_etag
+from app.models import HealthProgram
+from app.routes.client_routes import LIST_MAX_PAGE_SIZE, LIST_PAGE_SIZE
+from app.serializers import client_serializer, program_ref_serializer, program_serializer
+from app.session import REPLICA_BIND
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_uri(uri):
+    """Map a sync database URI onto its asyncio driver, e.g. postgresql:// -> postgresql+asyncpg://."""
+    scheme, sep, rest = uri.partition('://')
+    backend = scheme.split('+', 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {scheme!r}; set ASYNC_DATABASE_URI')
+    return ASYNC_DRIVERS[backend] + sep + rest
+
+
+def wsgi_environ(scope):
+    """WSGI environ for a bodyless ASGI HTTP request, as asgiref's adapter builds it."""
+    script_name = scope.get('root_path', '').encode('utf8').decode('latin1')
+    path_info = scope['path'].encode('utf8').decode('latin1')
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope['http_version'],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = 'HTTP_' + name
+        value = value.decode('latin1')
+        environ[name] = environ[name] + ',' + value if name in environ else value
+    return environ
+
+
+class NotFound(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+class AsyncApp:
+    """ASGI application combining native async read handlers with the WSGI Flask app."""
+
+    def __init__(self, flask_app):
+        from asgiref.wsgi import WsgiToAsgi
+
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        config = flask_app.config
+        self.engine = self._create_engine(
+            config['ASYNC_DATABASE_URI'] or async_database_uri(config['SQLALCHEMY_DATABASE_URI']))
+        self.replica_engine = None
+        if config['SQLALCHEMY_BINDS'].get(REPLICA_BIND):
+            self.replica_engine = self._create_engine(
+                async_database_uri(config['SQLALCHEMY_BINDS'][REPLICA_BIND]))
+        self.primary_sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        # Uncached reads go to the replica when one is configured, as on the WSGI
+        # path; cache fills read the primary (see ResponseCache.json_response)
+        self.sessions = async_sessionmaker(self.replica_engine or self.engine, expire_on_commit=False)
+        self.routes = [
+            (re.compile(r'^/programs$'), self.list_programs),
+            (re.compile(r'^/programs/(\d+)$'), self.get_program),
+            (re.compile(r'^/clients$'), self.list_clients),
+            (re.compile(r'^/clients/(\d+)$'), self.get_client_profile),
+            (re.compile(r'^/clients/(\d+)/programs$'), self.get_client_programs),
+        ]
+
+    def _create_engine(self, uri):
+        options = {}
+        if not uri.startswith('sqlite'):
+            options = {'pool_size': self.flask_app.config['ASYNC_POOL_SIZE'], 'pool_pre_ping': True}
+        return create_async_engine(uri, **options)
+
+    @property
+    def cache(self):
+        return self.flask_app.extensions['response_cache']
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            for pattern, handler in self.routes:
+                match = pattern.match(scope['path'])
+                if match:
+                    args = parse_qs(scope['query_string'].decode())
+                    handled = await self._dispatch(scope, send, handler, args, *map(int, match.groups()))
+                    if handled:
+                        return
+                    break
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                if self.replica_engine is not None:
+                    await self.replica_engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _dispatch(self, scope, send, handler, args, *params):
+        """Run ``handler`` between the Flask app's request hooks, then send its response.
+
+        Returns False, without sending anything, if the handler leaves the
+        request to the WSGI path.
+        """
+        app = self.flask_app
+        with app.request_context(wsgi_environ(scope)):
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await handler(args, *params)
+                    if rv is None:
+                        return False
+                response = app.process_response(app.make_response(rv))
+            except Exception as e:
+                response = app.make_response(app.handle_exception(e))
+
+        headers = [(name.lower().encode('latin1'), value.encode('latin1'))
+                   for name, value in response.headers.items()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        await send({'type': 'http.response.body',
+                    'body': b'' if scope['method'] == 'HEAD' else response.get_data()})
+        return True
+
+    async def _cache_call(self, method, *args):
+        if self.cache.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _cached(self, key, build):
+        """Same read-through contract as ResponseCache.json_response, shared backend and keys.
+
+        ``build(sessions)`` reads through the session factory it is given.
+        """
+        entry = await self._cache_call(self.cache.get, key) if key else None
+        if entry is None:
+            try:
+                payload = await build(self.primary_sessions if key else self.sessions)
+            except NotFound as e:
+                return jsonify({'error': e.message}), 404
+            if not key:
+                return payload  # uncached views return their payload untagged
+            entry = cache_entry(self.flask_app.json.dumps(payload))
+            await self._cache_call(self.cache.set, key, entry)
+        body, etag = entry
+        response = self.flask_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    async def _conditional(self, tables, respond):
+        """Async counterpart of the ``@conditional`` decorator for a version over ``tables``."""
+        async with self.sessions() as session:
+            value = tuple((await session.execute(version_query(*tables))).one())
+        etag = weak_etag(request.endpoint, request.query_string, value)
+        if request.if_none_match.contains_weak(etag):
+            response = self.flask_app.response_class(status=304)
+        else:
+            response = self.flask_app.make_response(await respond())
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag, weak=True)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _fields(self, args):
+        raw = args.get('fields', [''])[0]
+        return client_serializer.select([f.strip() for f in raw.split(',') if f.strip()])
+
+    async def list_programs(self, args):
+        async def build(sessions):
+            async with sessions() as session:
+                programs = (await session.execute(queries.program_list())).scalars()
+                return program_serializer.dump_many(programs)
+        return await self._conditional(
+            (HealthProgram.__table__,), lambda: self._cached(PROGRAM_LIST_KEY, build))
+
+    async def get_program(self, args, program_id):
+        async def build(sessions):
+            async with sessions() as session:
+                program = (await session.execute(queries.program(program_id))).scalar()
+            if program is None:
+                raise NotFound('Program not found')
+            return program_serializer.dump(program)
+        return await self._cached(ResponseCache.program_key(program_id), build)
+
+    async def list_clients(self, args):
+        # Full-table streaming stays on the WSGI path; only keyset pages are handled here
+        if 'limit' not in args and 'after_id' not in args or 'format' in args:
+            return None
+        try:
+            fields = self._fields(args)
+            limit = int(args.get('limit', [LIST_PAGE_SIZE])[0])
+            after_id = int(args['after_id'][0]) if 'after_id' in args else None
+        except ValueError:
+            return None  # let the blueprint produce its usual 400
+        if limit < 1:
+            return None
+        limit = min(limit, LIST_MAX_PAGE_SIZE)
+
+        async def build(sessions):
+            async with sessions() as session:
+                page = (await session.execute(queries.client_page(after_id, limit, fields))).scalars().all()
+            return {
+                'clients': client_serializer.dump_many(page, fields),
+                'next_after_id': page[-1].id if len(page) == limit else None,
+            }
+        return await self._cached(None, build)
+
+    async def get_client_profile(self, args, client_id):
+        try:
+            fields = self._fields(args)
+        except ValueError:
+            return None
+
+        async def build(sessions):
+            async with sessions() as session:
+                client = (await session.execute(queries.client_profile(client_id, fields))).scalar()
+            if client is None:
+                raise NotFound('Client not found')
+            return client_serializer.dump(client, fields)
+        key = None if 'fields' in args else ResponseCache.client_key(client_id)
+        return await self._cached(key, build)
+
+    async def get_client_programs(self, args, client_id):
+        async def build(sessions):
+            async with sessions() as session:
+                client = (await session.execute(queries.client_programs(client_id))).scalar()
+            if client is None:
+                raise NotFound('Client not found')
+            return {'programs': program_ref_serializer.dump_many(client.programs)}
+        return await self._cached(ResponseCache.client_programs_key(client_id), build)
+
+
+def create_asgi_app(test_config=None):
+    """Build the Flask app and wrap it for an ASGI server."""
+    return AsyncApp(create_app(test_config))
@@ -0,0 +1,222 @@
+import json
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from app import stats
+from app.cache import cache
+from app.models import db, Client, HealthProgram, client_programs, normalize_search_text
+from app.normalize import blocking_keys, normalize_email
+from app.utils import chunked, dialect_insert, parse_date, extract_program_ids
+
+CLIENT_FIELDS = ('first_name', 'last_name', 'gender', 'phone_number', 'email', 'address')
+
+
+def iter_ndjson(lines):
+    """Decode an NDJSON byte stream, yielding a dict or a ValueError per non-blank line."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON: {e}')
+
+
+def _validate(record):
+    """Return (row, program_ids) for a valid record or raise ValueError."""
+    if isinstance(record, ValueError):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError('Each client must be a JSON object')
+    for field in ('first_name', 'last_name'):
+        if not record.get(field):
+            raise ValueError(f'{field} is required')
+    try:
+        dob = parse_date(record.get('date_of_birth'))
+    except ValueError as e:
+        raise ValueError(f'Invalid date format. Use YYYY-MM-DD. Error: {e}')
+    programs = record.get('programs', [])
+    if not isinstance(programs, list):
+        raise ValueError('Programs must be an array')
+
+    row = {field: record.get(field) for field in CLIENT_FIELDS}
+    row['email'] = normalize_email(row['email'])
+    for field in ('first_name', 'last_name', 'phone_number', 'email'):
+        if row[field] is not None and not isinstance(row[field], str):
+            raise ValueError(f'{field} must be a string')
+    row['date_of_birth'] = dob
+    # Bulk inserts bypass mapper events, so the derived columns are filled here
+    row['search_text'] = normalize_search_text(row['first_name'], row['last_name'], row['email'])
+    row.update(blocking_keys(row['last_name'], dob, row['phone_number']))
+    return row, extract_program_ids(programs)
+
+
+def register_clients(records, chunk_size=1000, progress=None):
+    """Validate and insert client records in chunked transactions.
+
+    ``progress(done, total)`` is called after each chunk if given.
+    Returns one result dict per input record, in input order.
+    """
+    results = []
+    valid = []  # (index, row, program_ids)
+    seen_emails = set()
+
+    # Single validation pass over the whole batch
+    for index, record in enumerate(records):
+        try:
+            row, program_ids = _validate(record)
+        except ValueError as e:
+            results.append({'index': index, 'status': 'error', 'error': str(e)})
+            continue
+        if row['email']:
+            # Compared case-insensitively, like the unique index
+            email = row['email'].lower()
+            if email in seen_emails:
+                results.append({'index': index, 'status': 'error',
+                                'error': 'Duplicate email in batch'})
+                continue
+            seen_emails.add(email)
+        results.append(None)
+        valid.append((index, row, program_ids))
+
+    # Set-based lookups: existing emails and known programs
+    existing_emails = set()
+    for emails in chunked(seen_emails, chunk_size):
+        existing_emails.update(
+            db.session.execute(
+                db.select(db.func.lower(Client.email)).where(db.func.lower(Client.email).in_(emails))
+            ).scalars()
+        )
+    referenced = {pid for _, _, pids in valid for pid in pids}
+    known_programs = set()
+    for pids in chunked(referenced, chunk_size):
+        known_programs.update(
+            db.session.execute(db.select(HealthProgram.id).where(HealthProgram.id.in_(pids))).scalars()
+        )
+
+    pending = []
+    for index, row, program_ids in valid:
+        if row['email'] and row['email'].lower() in existing_emails:
+            results[index] = {'index': index, 'status': 'error',
+                              'error': 'Client with this email already exists'}
+        else:
+            pending.append((index, row, [pid for pid in dict.fromkeys(program_ids)
+                                         if pid in known_programs]))
+
+    done = len(results) - len(pending)
+    for chunk in chunked(pending, chunk_size):
+        try:
+            ids = db.session.execute(
+                insert(Client).returning(Client.id, sort_by_parameter_order=True),
+                [row for _, row, _ in chunk]
+            ).scalars().all()
+            enrollments = [
+                {'client_id': client_id, 'program_id': pid}
+                for client_id, (_, _, program_ids) in zip(ids, chunk)
+                for pid in program_ids
+            ]
+            if enrollments:
+                db.session.execute(insert(client_programs), enrollments)
+            stats.record_enrollments(Counter(e['program_id'] for e in enrollments))
+            stats.record_clients(Counter(
+                stats.demographic_key(row['gender'], row['date_of_birth']) for _, row, _ in chunk))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            for index, _, _ in chunk:
+                results[index] = {'index': index, 'status': 'error',
+                                  'error': 'Database error', 'details': str(e)}
+        else:
+            for client_id, (index, _, _) in zip(ids, chunk):
+                results[index] = {'index': index, 'status': 'created', 'id': client_id}
+        done += len(chunk)
+        if progress is not None:
+            progress(done, len(results))
+
+    return results
+
+
+def _insert_enrollments(rows):
+    """Insert client_programs rows, skipping pairs that already exist.
+
+    Returns a Counter of rows written per program_id.
+    """
+    insert_ignore = dialect_insert(db.session)
+    if insert_ignore is not None:
+        stmt = (insert_ignore(client_programs)
+                .on_conflict_do_nothing(index_elements=['client_id', 'program_id'])
+                .returning(client_programs.c.program_id))
+        return Counter(db.session.execute(stmt, rows).scalars())
+
+    # Other backends: filter out existing pairs with one query, then plain insert
+    client_ids = {r['client_id'] for r in rows}
+    program_ids = {r['program_id'] for r in rows}
+    existing = set(db.session.execute(
+        db.select(client_programs.c.client_id, client_programs.c.program_id)
+        .where(client_programs.c.client_id.in_(client_ids),
+               client_programs.c.program_id.in_(program_ids))
+    ).tuples())
+    rows = [r for r in rows if (r['client_id'], r['program_id']) not in existing]
+    if rows:
+        db.session.execute(insert(client_programs), rows)
+    return Counter(r['program_id'] for r in rows)
+
+
+def enroll_clients(enrollments, chunk_size=1000):
+    """Write (client_id, program_id) enrollments in chunked INSERT ... ON CONFLICT DO NOTHING batches.
+
+    ``enrollments`` yields dicts with client_id, program_id and optional
+    enrollment_date/notes. Returns counts plus the ids that do not exist.
+    """
+    enrolled = 0
+    already_enrolled = 0
+    missing_clients = set()
+    missing_programs = set()
+    known_clients = set()
+    known_programs = set()
+
+    for chunk in chunked(enrollments, chunk_size):
+        # Deduplicate pairs inside the chunk, keeping the first occurrence
+        pairs = {}
+        for r in chunk:
+            pairs.setdefault((r['client_id'], r['program_id']), r)
+        rows = list(pairs.values())
+
+        new_clients = {r['client_id'] for r in rows} - known_clients - missing_clients
+        if new_clients:
+            found = set(db.session.execute(
+                db.select(Client.id).where(Client.id.in_(new_clients))).scalars())
+            known_clients |= found
+            missing_clients |= new_clients - found
+        new_programs = {r['program_id'] for r in rows} - known_programs - missing_programs
+        if new_programs:
+            found = set(db.session.execute(
+                db.select(HealthProgram.id).where(HealthProgram.id.in_(new_programs))).scalars())
+            known_programs |= found
+            missing_programs |= new_programs - found
+
+        now = datetime.now()
+        rows = [{
+            'client_id': r['client_id'],
+            'program_id': r['program_id'],
+            'enrollment_date': r.get('enrollment_date') or now,
+            'notes': r.get('notes'),
+        } for r in rows if r['client_id'] in known_clients and r['program_id'] in known_programs]
+        if not rows:
+            continue
+
+        written = _insert_enrollments(rows)
+        stats.record_enrollments(written)
+        db.session.commit()
+        cache.invalidate_clients({r['client_id'] for r in rows})
+        enrolled += sum(written.values())
+        already_enrolled += len(rows) - sum(written.values())
+
+    return {
+        'enrolled': enrolled,
+        'already_enrolled': already_enrolled,
+        'missing_client_ids': sorted(missing_clients),
+        'missing_program_ids': sorted(missing_programs),
+    }
@@ -0,0 +1,192 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, current_app, g, request
+from werkzeug.utils import import_string
+
+
+class CacheBackend:
+    """Interface for response cache stores.
+
+    Values are small picklable tuples, so a networked store (e.g. Redis) only
+    needs to serialize them and map ``delete_prefix`` onto a key scan.
+    """
+
+    # Whether calls may wait on I/O; the ASGI read path (app/aio.py) runs those
+    # in a worker thread instead of on its event loop
+    blocking = True
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything; disables caching."""
+
+    blocking = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def delete_prefix(self, prefix):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache with per-entry TTL.
+
+    Each process keeps its own entries, and invalidation only reaches the
+    process that handled the write. With several gunicorn workers, the others
+    keep serving an entry for up to its TTL after a change. Deployments that
+    need read-after-write consistency across workers should configure a shared
+    backend, or NullCache.
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries=1024, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(max_entries=config['CACHE_MAX_ENTRIES'], default_ttl=config['CACHE_TTL'])
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def cache_entry(body):
+    """Cached value for a serialized body: (body, strong ETag)."""
+    return body, hashlib.sha1(body.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Read-through cache of serialized JSON responses with ETag support."""
+
+    def init_app(self, app):
+        backend = app.config['CACHE_BACKEND']
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        app.extensions['response_cache'] = backend.from_config(app.config)
+
+    @property
+    def backend(self):
+        return current_app.extensions['response_cache']
+
+    def json_response(self, key, build):
+        """Serve ``key`` from cache, or call ``build() -> (payload, status)`` and cache a 200.
+
+        Non-200 results are returned uncached so a 404 never outlives a create.
+        """
+        entry = self.backend.get(key)
+        if entry is None:
+            # Fill from the primary: a replica still behind the write that just
+            # invalidated this key would otherwise be cached for the whole TTL
+            use_replica, g.use_replica = g.get('use_replica', False), False
+            try:
+                payload, status = build()
+            finally:
+                g.use_replica = use_replica
+            if status != 200:
+                return payload, status
+            entry = cache_entry(current_app.json.dumps(payload))
+            self.backend.set(key, entry)
+
+        body, etag = entry
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    def invalidate(self, *keys):
+        self.backend.delete(*keys)
+
+    def invalidate_prefix(self, prefix):
+        self.backend.delete_prefix(prefix)
+
+    # Key helpers shared by the blueprints
+
+    @staticmethod
+    def program_key(program_id):
+        return f'program:{program_id}'
+
+    @staticmethod
+    def client_key(client_id):
+        return f'client:{client_id}'
+
+    @staticmethod
+    def client_programs_key(client_id):
+        return f'client:{client_id}:programs'
+
+    def invalidate_program(self, program_id):
+        self.invalidate(PROGRAM_LIST_KEY, self.program_key(program_id))
+        # Client payloads embed program names
+        self.invalidate_prefix('client:')
+
+    def invalidate_clients(self, client_ids):
+        self.invalidate(*(key for cid in client_ids
+                          for key in (self.client_key(cid), self.client_programs_key(cid))))
+
+
+PROGRAM_LIST_KEY = 'programs'
+
+cache = ResponseCache()
@@ -0,0 +1,112 @@
+"""Change feed for offline clients (GET /sync).
+
+Every synced table has an indexed ``updated_at`` column, and deletes leave a
+row in ``tombstones``. A sync token holds one keyset position per stream:
+(updated_at, primary key). Each page is therefore a range scan that starts
+right after the last row the caller saw, so its cost follows the number of
+changes rather than table size.
+
+Rows newer than ``now - SYNC_SETTLE_SECONDS`` are held back until the next
+call. Without that margin, a transaction that stamps ``updated_at`` and then
+commits late could land behind a cursor that has already moved past it.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from sqlalchemy import insert, tuple_
+from app.models import db, Client, HealthProgram, Tombstone, client_programs
+from app.serializers import client_serializer, enrollment_serializer, program_serializer
+
+CLIENT_FIELDS = tuple(f for f in client_serializer.fields if f != 'programs')
+
+
+def _tombstone(row):
+    if row.entity == 'enrollment':
+        return {'entity': 'enrollment', 'client_id': row.entity_id, 'program_id': row.related_id,
+                'deleted_at': row.deleted_at.isoformat()}
+    return {'entity': row.entity, 'id': row.entity_id, 'deleted_at': row.deleted_at.isoformat()}
+
+
+class Stream(NamedTuple):
+    updated_at: object  # change timestamp column
+    keys: tuple  # primary key columns, the keyset tie-breaker
+    query: object  # () -> SELECT of the rows to return
+    dump: object  # rows -> list of dicts
+    orm: bool = True  # rows are model instances rather than table rows
+
+
+STREAMS = {
+    'clients': Stream(Client.updated_at, (Client.id,),
+                      lambda: db.select(Client).options(*client_serializer.load_options(CLIENT_FIELDS)),
+                      lambda rows: client_serializer.dump_many(rows, CLIENT_FIELDS)),
+    'programs': Stream(HealthProgram.updated_at, (HealthProgram.id,),
+                       lambda: db.select(HealthProgram), program_serializer.dump_many),
+    'enrollments': Stream(client_programs.c.updated_at,
+                          (client_programs.c.client_id, client_programs.c.program_id),
+                          lambda: db.select(client_programs), enrollment_serializer.dump_many, orm=False),
+    'deleted': Stream(Tombstone.deleted_at, (Tombstone.id,),
+                      lambda: db.select(Tombstone), lambda rows: [_tombstone(r) for r in rows]),
+}
+
+
+def record_deletes(entity, keys):
+    """Write tombstones for deleted ``keys`` (ids, or (client_id, program_id) for enrollments)."""
+    if not keys:
+        return
+    now = datetime.now()
+    rows = [{'entity': entity, 'entity_id': key[0], 'related_id': key[1], 'deleted_at': now}
+            if isinstance(key, tuple) else
+            {'entity': entity, 'entity_id': key, 'related_id': None, 'deleted_at': now}
+            for key in keys]
+    db.session.execute(insert(Tombstone), rows)
+
+
+def encode_token(cursors):
+    raw = json.dumps(cursors, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_token(token):
+    """Parse a sync token into {stream: [iso timestamp, *key]}. Raises ValueError."""
+    if not token:
+        return {}
+    try:
+        cursors = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid sync token')
+    if not isinstance(cursors, dict):
+        raise ValueError('Invalid sync token')
+    for name, cursor in cursors.items():
+        if (name not in STREAMS or not isinstance(cursor, list)
+                or len(cursor) != 1 + len(STREAMS[name].keys)):
+            raise ValueError('Invalid sync token')
+        try:
+            datetime.fromisoformat(cursor[0])
+        except (TypeError, ValueError):
+            raise ValueError('Invalid sync token')
+    return cursors
+
+
+def changes_since(cursors, limit, settle_seconds=0):
+    """Return ({stream: [rows]}, new cursors, has_more) for up to ``limit`` rows per stream."""
+    horizon = datetime.now() - timedelta(seconds=settle_seconds)
+    result = {}
+    next_cursors = dict(cursors)
+    has_more = False
+    for name, stream in STREAMS.items():
+        position = (stream.updated_at,) + stream.keys
+        stmt = stream.query().where(stream.updated_at <= horizon).order_by(*position).limit(limit)
+        cursor = cursors.get(name)
+        if cursor is not None:
+            stmt = stmt.where(tuple_(*position) > tuple_(datetime.fromisoformat(cursor[0]), *cursor[1:]))
+        execution = db.session.execute(stmt)
+        rows = execution.scalars().all() if stream.orm else execution.all()
+        result[name] = stream.dump(rows)
+        if rows:
+            last = rows[-1]
+            next_cursors[name] = [getattr(last, column.key) for column in position]
+            next_cursors[name][0] = next_cursors[name][0].isoformat()
+        has_more = has_more or len(rows) == limit
+    return result, next_cursors, has_more
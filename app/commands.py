@@ -0,0 +1,55 @@
+import click
+from flask import current_app
+from flask.cli import ScriptInfo, with_appcontext
+from app import dedup
+
+
+@click.command('find-duplicates')
+@click.option('--by', 'by', multiple=True, type=click.Choice(list(dedup.BLOCK_COLUMNS)),
+              help='Blocking keys to scan (default: all).')
+@click.option('--threshold', default=dedup.DEFAULT_THRESHOLD, show_default=True, type=float)
+@click.option('--workers', type=int, help='Comparison processes (default: CPU count).')
+@click.option('--output', type=click.File('w'), default='-', help='NDJSON output file (default: stdout).')
+@with_appcontext
+def find_duplicates_command(by, threshold, workers, output):
+    """Scan all clients for likely duplicates and write the pairs as NDJSON."""
+    count = 0
+    for pair in dedup.scan(by or tuple(dedup.BLOCK_COLUMNS), threshold, workers):
+        output.write(current_app.json.dumps(pair) + '\n')
+        count += 1
+    click.echo(f'{count} candidate pairs', err=True)
+
+
+@click.command('db', add_help_option=False,
+               context_settings={'ignore_unknown_options': True, 'allow_extra_args': True})
+@click.pass_context
+def db_command(ctx):
+    """Perform database migrations (Flask-Migrate)."""
+    # Flask-Migrate pulls in Alembic, so it's loaded only when a db command runs
+    from flask_migrate import Migrate
+    from flask_migrate.cli import db as migrate_group
+    from app.models import db
+
+    script_info = ctx.ensure_object(ScriptInfo)
+    app = script_info.load_app()
+    if 'migrate' not in app.extensions:
+        Migrate(app, db)
+    migrate_group.main(args=ctx.args, prog_name=ctx.command_path, obj=script_info)
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create all tables on an empty database and mark it as migrated to head.
+
+    Use this once when provisioning; afterwards run `flask db upgrade` and
+    start workers with DB_CREATE_ALL=false.
+    """
+    from flask_migrate import Migrate, stamp
+    from app.models import db
+
+    db.create_all()
+    if 'migrate' not in current_app.extensions:
+        Migrate(current_app, db)
+    stamp()
+    click.echo('Database created and stamped at head')
@@ -0,0 +1,60 @@
+"""Response compression for buffered text payloads.
+
+Responses of at least COMPRESS_MIN_SIZE bytes are compressed with brotli when
+the client accepts it and the package is installed, and with gzip otherwise.
+Streamed bodies (app/streaming.py compresses those itself), file downloads and
+responses that already carry a Content-Encoding pass through untouched.
+"""
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html',
+})
+
+
+def _encoding():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _compress(data, encoding):
+    config = current_app.config
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300 or response.status_code in (204, 206)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    length = response.calculate_content_length()
+    if length is None or length < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(_compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ from the identity body, so a strong tag would lie
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Install the compression hook on ``app``."""
+    # after_request hooks run in reverse registration order; registering this
+    # after init_metrics means response-size metrics count compressed bytes
+    app.after_request(compress_response)
@@ -0,0 +1,86 @@
+"""Weak ETags from table version counters, and 304 Not Modified for collections.
+
+A collection's version is the row count plus the latest ``updated_at`` of
+every table its payload is built from. Inserts and updates move the
+timestamp. Deletes change the count. One indexed aggregate query decides
+whether the client's copy is current, so an unchanged collection is never
+loaded or serialized. The counts scan whole tables, so they are only run
+where the alternative is rebuilding the whole collection.
+"""
+import hashlib
+from functools import wraps
+from flask import current_app, request
+from app.models import db, Client, HealthProgram, client_programs
+
+
+def _counters(table):
+    return (db.select(db.func.count()).select_from(table).scalar_subquery(),
+            db.select(db.func.max(table.c.updated_at)).scalar_subquery())
+
+
+def version_query(*tables):
+    """SELECT of (count, max updated_at) for each table, in one round trip."""
+    return db.select(*(column for table in tables for column in _counters(table)))
+
+
+def table_version(*tables):
+    return tuple(db.session.execute(version_query(*tables)).one())
+
+
+def clients_version():
+    # Keyset pages are cheaper to rebuild than the counts; only the full
+    # list, which streams every client, is worth tagging
+    if 'after_id' in request.args or 'limit' in request.args:
+        return None
+    # Client payloads embed program names
+    return table_version(Client.__table__, client_programs, HealthProgram.__table__)
+
+
+def programs_version():
+    return table_version(HealthProgram.__table__)
+
+
+def program_clients_version(program_id):
+    """Version of one program's client list, or None if the program doesn't exist."""
+    cp = client_programs.c
+    program_updated = (db.select(HealthProgram.updated_at)
+                       .where(HealthProgram.id == program_id).scalar_subquery())
+    row = db.session.execute(
+        db.select(program_updated, db.func.count(), db.func.max(cp.updated_at),
+                  db.func.max(Client.updated_at))
+        .select_from(client_programs)
+        .join(Client, Client.id == cp.client_id)
+        .where(cp.program_id == program_id)
+    ).one()
+    return None if row[0] is None else tuple(row)
+
+
+def weak_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def conditional(version):
+    """Tag a collection view with a weak ETag derived from ``version(**view_args)``.
+
+    A matching If-None-Match gets ``304 Not Modified`` without running the
+    view. If ``version`` returns None, the view runs untagged, e.g. to produce
+    its own 404.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            value = version(*args, **kwargs)
+            if value is None:
+                return view(*args, **kwargs)
+            etag = weak_etag(request.endpoint, request.query_string, value)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.vary.add('Accept-Encoding')
+            return response
+        return wrapper
+    return decorator
@@ -2,6 +2,77 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options(uri):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from the environment for the given database URI."""
+    options = {
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+    # SQLite (notably in-memory) pools do not accept sizing arguments
+    if uri and not uri.startswith('sqlite'):
+        options.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        })
+    statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout and uri and uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+    return options
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Create missing tables at startup. Deployments managed with `flask db upgrade`
+    # should turn this off so workers boot without touching the database.
+    DB_CREATE_ALL = _env_bool('DB_CREATE_ALL', True)
+    # Optional read replica; GET routes read from it when configured
+    SQLALCHEMY_BINDS = (
+        {'replica': os.getenv('SQLALCHEMY_REPLICA_URI')}
+        if os.getenv('SQLALCHEMY_REPLICA_URI') else {}
+    )
+    # Rows per transaction for bulk write endpoints
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 1000))
+    # Response cache: dotted path to a CacheBackend subclass, entry TTL in seconds.
+    # The default LRUCache is per worker: other workers can serve a changed
+    # entry until its TTL runs out, so keep the TTL short or use a shared backend.
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'app.cache:LRUCache')
+    CACHE_TTL = int(os.getenv('CACHE_TTL', 30))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    # Request instrumentation: /metrics, optional Server-Timing headers, slow request log (0 disables)
+    METRICS_ENABLED = _env_bool('METRICS_ENABLED', True)
+    METRICS_SERVER_TIMING = _env_bool('METRICS_SERVER_TIMING', False)
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
+    # Response compression: minimum body size in bytes, gzip level, brotli quality (if installed)
+    COMPRESS_ENABLED = _env_bool('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+    # Idempotency-Key replay store: retention in seconds, in-process LRU size
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 24 * 3600))
+    # Seconds a pending key blocks retries before one may take it over; must
+    # outlast the slowest idempotent request
+    IDEMPOTENCY_LEASE = int(os.getenv('IDEMPOTENCY_LEASE', 120))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', 10000))
+    # GET /sync holds back rows changed within this many seconds (see app/changes.py)
+    SYNC_SETTLE_SECONDS = int(os.getenv('SYNC_SETTLE_SECONDS', 5))
+    # Sub-requests accepted per POST /batch
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+    # Background jobs: worker threads, jobs allowed to wait, output directory (default: instance/jobs)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_QUEUE_DEPTH = int(os.getenv('JOB_QUEUE_DEPTH', 16))
+    JOB_DIR = os.getenv('JOB_DIR')
+    # Optional ASGI mode (app/aio.py); derived from SQLALCHEMY_DATABASE_URI when unset.
+    # Uncached reads use SQLALCHEMY_REPLICA_URI's async driver when a replica is configured.
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
+    ASYNC_POOL_SIZE = int(os.getenv('ASYNC_POOL_SIZE', 10))
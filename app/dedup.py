@@ -0,0 +1,196 @@
+"""Duplicate-client detection.
+
+Clients are only compared within blocks that share an indexed key:
+``block_key`` (surname Soundex + birth year) or ``phone_key`` (trailing phone
+digits). Each candidate pair gets a score from name similarity plus matching
+date of birth, phone and email. This keeps the work close to linear in the
+number of clients instead of comparing every pair.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from itertools import combinations, groupby
+from app.models import db, Client
+from app.normalize import normalize_name
+
+BLOCK_COLUMNS = {'name': 'block_key', 'phone': 'phone_key'}
+DEFAULT_THRESHOLD = 0.8
+# Blocks larger than this (e.g. a very common surname with unknown birth year)
+# are reported as skipped rather than compared pairwise
+MAX_BLOCK_SIZE = 500
+# Rows per unit of work handed to a pool worker
+SCAN_TASK_ROWS = 20000
+
+_COLUMNS = (Client.id, Client.first_name, Client.last_name, Client.date_of_birth,
+            Client.phone_key, Client.email)
+
+
+def _prepare(row):
+    client_id, first_name, last_name, dob, phone_key, email = row
+    return (client_id, normalize_name(first_name), normalize_name(last_name),
+            dob, phone_key, (email or '').strip().lower() or None)
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def score(a, b, threshold=0.0):
+    """Score two prepared records in [0, 1]; returns (score, reasons).
+
+    Name similarity is worth at most 0.6, so the exact-match evidence is
+    checked first. Pairs that can't reach ``threshold`` skip the string
+    comparison and score 0.
+    """
+    _, first_a, last_a, dob_a, phone_a, email_a = a
+    _, first_b, last_b, dob_b, phone_b, email_b = b
+    reasons = []
+    bonus = 0.0
+    factor = 1.0
+    if dob_a and dob_b:
+        if dob_a == dob_b:
+            bonus += 0.2
+            reasons.append('date_of_birth')
+        else:
+            factor = 0.5
+    if phone_a and phone_a == phone_b:
+        bonus += 0.2
+        reasons.append('phone')
+    elif email_a and email_a == email_b:
+        bonus += 0.2
+        reasons.append('email')
+    if (0.6 + bonus) * factor < threshold:
+        return 0.0, []
+
+    names = (_similarity(first_a, first_b) + _similarity(last_a, last_b)) / 2
+    swapped = (_similarity(first_a, last_b) + _similarity(last_a, first_b)) / 2
+    similarity = max(names, swapped)
+    if similarity >= 0.85:
+        reasons.insert(0, 'name')
+    return round(min((0.6 * similarity + bonus) * factor, 1.0), 3), reasons
+
+
+def compare_block(rows, threshold=DEFAULT_THRESHOLD):
+    """Candidate pairs within one block of raw client rows, as result dicts."""
+    records = [_prepare(row) for row in rows]
+    pairs = []
+    for a, b in combinations(records, 2):
+        value, reasons = score(a, b, threshold)
+        if value >= threshold:
+            pairs.append({'client_ids': sorted((a[0], b[0])), 'score': value, 'reasons': reasons})
+    return pairs
+
+
+def compare_blocks(blocks, threshold=DEFAULT_THRESHOLD):
+    """Process-pool entry point: compare a list of blocks."""
+    return [pair for rows in blocks for pair in compare_block(rows, threshold)]
+
+
+def candidates_for(client_id, threshold=DEFAULT_THRESHOLD, limit=MAX_BLOCK_SIZE):
+    """Likely duplicates of one client, best first. Returns None if the client doesn't exist."""
+    client = db.session.execute(
+        db.select(*_COLUMNS, Client.block_key).where(Client.id == client_id)
+    ).one_or_none()
+    if client is None:
+        return None
+    *row, block_key = client
+    keys = [column == value for column, value in ((Client.block_key, block_key),
+                                                  (Client.phone_key, row[4])) if value]
+    if not keys:
+        return []
+    others = db.session.execute(
+        db.select(*_COLUMNS).where(db.or_(*keys), Client.id != client_id).limit(limit)
+    ).all()
+    target = _prepare(row)
+    matches = []
+    for other in others:
+        value, reasons = score(target, _prepare(other), threshold)
+        if value >= threshold:
+            matches.append({'client_id': other[0], 'score': value, 'reasons': reasons})
+    return sorted(matches, key=lambda m: (-m['score'], m['client_id']))
+
+
+def duplicate_page(by='name', after=None, limit=100, threshold=DEFAULT_THRESHOLD):
+    """Compare the next ``limit`` multi-member blocks after key ``after``.
+
+    Returns (pairs, skipped block keys, next cursor or None).
+    """
+    column = getattr(Client, BLOCK_COLUMNS[by])
+    query = (db.select(column, db.func.count())
+             .where(column.is_not(None))
+             .group_by(column)
+             .having(db.func.count() > 1)
+             .order_by(column)
+             .limit(limit))
+    if after is not None:
+        query = query.where(column > after)
+    blocks = db.session.execute(query).all()
+    keys = [key for key, size in blocks if size <= MAX_BLOCK_SIZE]
+    skipped = [key for key, size in blocks if size > MAX_BLOCK_SIZE]
+
+    pairs = []
+    if keys:
+        rows = db.session.execute(
+            db.select(column, *_COLUMNS).where(column.in_(keys)).order_by(column, Client.id)
+        ).all()
+        for _, block in groupby(rows, key=lambda r: r[0]):
+            pairs.extend(compare_block([r[1:] for r in block], threshold))
+    next_after = blocks[-1][0] if len(blocks) == limit else None
+    return pairs, skipped, next_after
+
+
+def _iter_blocks(column, yield_per):
+    """Stream rows ordered by block key and yield blocks worth comparing."""
+    rows = db.session.execute(
+        db.select(column, *_COLUMNS).where(column.is_not(None)).order_by(column, Client.id)
+        .execution_options(yield_per=yield_per)
+    )
+    for _, block in groupby(rows, key=lambda r: r[0]):
+        block = [tuple(r[1:]) for r in block]
+        if 1 < len(block) <= MAX_BLOCK_SIZE:
+            yield block
+
+
+def _tasks(blocks, task_rows=SCAN_TASK_ROWS):
+    task, size = [], 0
+    for block in blocks:
+        task.append(block)
+        size += len(block)
+        if size >= task_rows:
+            yield task
+            task, size = [], 0
+    if task:
+        yield task
+
+
+def scan(by=('name', 'phone'), threshold=DEFAULT_THRESHOLD, workers=None):
+    """Find duplicate pairs across all clients. Must run in an app context.
+
+    The main process streams rows sorted by block key, so memory stays
+    bounded. Comparison is spread over a process pool of ``workers``
+    (default: CPU count). Yields each pair once, even when it shares several
+    blocks.
+    """
+    workers = workers or os.cpu_count() or 1
+    seen = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name in by:
+            column = getattr(Client, BLOCK_COLUMNS[name])
+            pending = []
+            for task in _tasks(_iter_blocks(column, SCAN_TASK_ROWS)):
+                pending.append(pool.submit(compare_blocks, task, threshold))
+                # Bound in-flight work so results don't pile up in memory
+                if len(pending) >= 2 * workers:
+                    yield from _unseen(pending.pop(0).result(), seen)
+            for future in pending:
+                yield from _unseen(future.result(), seen)
+
+
+def _unseen(pairs, seen):
+    for pair in pairs:
+        key = tuple(pair['client_ids'])
+        if key not in seen:
+            seen.add(key)
+            yield pair
@@ -0,0 +1,106 @@
+"""Set-based deletes for clients and programs.
+
+Nothing here loads ORM objects. Enrollment rows go in a single DELETE per
+call; ``ON DELETE CASCADE`` on client_programs would remove them anyway, but
+deleting them explicitly yields the per-program counts the stats rollups
+need, and keeps working on connections without foreign key enforcement.
+``delete_clients`` and ``delete_program`` leave the transaction and cache
+invalidation to the caller. ``bulk_delete_clients`` commits per chunk.
+"""
+from collections import Counter
+from app import changes, stats
+from app.cache import cache
+from app.models import db, Client, HealthProgram, ProgramStats, client_programs
+from app.utils import chunked, dialect_insert
+
+cp = client_programs.c
+
+
+def _delete_returning(table, conditions, *columns):
+    """Run DELETE ... RETURNING ``columns`` (or SELECT, then DELETE) and return the rows."""
+    stmt = db.delete(table).where(*conditions)
+    if dialect_insert(db.session) is not None:
+        return db.session.execute(stmt.returning(*columns)).all()
+    rows = db.session.execute(db.select(*columns).where(*conditions)).all()
+    if rows:
+        db.session.execute(stmt)
+    return rows
+
+
+def delete_clients(client_ids):
+    """Delete clients with their enrollments and update rollups and tombstones.
+
+    Returns the ids that existed and were deleted.
+    """
+    if not client_ids:
+        return []
+    removed = _delete_returning(client_programs, [cp.client_id.in_(client_ids)], cp.program_id)
+    stats.record_enrollments({pid: -n for pid, n in Counter(pid for (pid,) in removed).items()})
+    rows = _delete_returning(Client.__table__, [Client.id.in_(client_ids)],
+                             Client.id, Client.gender, Client.date_of_birth)
+    demographics = Counter(stats.demographic_key(gender, dob) for _, gender, dob in rows)
+    stats.record_clients({key: -n for key, n in demographics.items()})
+    deleted = [client_id for client_id, _, _ in rows]
+    changes.record_deletes('client', deleted)
+    return deleted
+
+
+def delete_program(program_id):
+    """Delete a program, its enrollments and its rollup row. Returns False if it didn't exist."""
+    db.session.execute(db.delete(client_programs).where(cp.program_id == program_id))
+    db.session.execute(db.delete(ProgramStats).where(ProgramStats.program_id == program_id))
+    deleted = _delete_returning(HealthProgram.__table__, [HealthProgram.id == program_id], HealthProgram.id)
+    if deleted:
+        changes.record_deletes('program', [program_id])
+    return bool(deleted)
+
+
+def client_filters(program_id=None, created_from=None, created_to=None):
+    """WHERE conditions selecting clients enrolled in a program and/or registered in a date range."""
+    conditions = []
+    if program_id is not None:
+        conditions.append(db.select(cp.client_id).where(
+            cp.client_id == Client.id, cp.program_id == program_id).exists())
+    if created_from is not None:
+        conditions.append(Client.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(Client.created_at < created_to)
+    return conditions
+
+
+def bulk_delete_clients(client_ids=None, conditions=None, chunk_size=1000):
+    """Delete clients by id list or by ``client_filters`` conditions, one transaction per chunk.
+
+    Filtered deletes walk the matching ids in keyset order. Returns the
+    number deleted and, for id lists, the ids that didn't exist.
+    """
+    deleted = 0
+    missing = []
+    if client_ids is not None:
+        chunks = chunked(dict.fromkeys(client_ids), chunk_size)
+    else:
+        chunks = _matching_id_chunks(conditions, chunk_size)
+    for chunk in chunks:
+        removed = delete_clients(chunk)
+        db.session.commit()
+        cache.invalidate_clients(removed)
+        deleted += len(removed)
+        if client_ids is not None:
+            removed = set(removed)
+            missing.extend(cid for cid in chunk if cid not in removed)
+    return {'deleted': deleted, 'missing_client_ids': missing}
+
+
+def _matching_id_chunks(conditions, chunk_size):
+    after_id = 0
+    while True:
+        ids = list(db.session.execute(
+            db.select(Client.id).where(*conditions, Client.id > after_id)
+            .order_by(Client.id).limit(chunk_size)
+        ).scalars())
+        if not ids:
+            return
+        yield ids
+        if len(ids) < chunk_size:
+            return
+        after_id = ids[-1]
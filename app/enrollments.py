@@ -0,0 +1,77 @@
+"""Set-based membership writes for a single client's client_programs rows."""
+from datetime import datetime
+from sqlalchemy import insert, literal
+from app import changes
+from app.models import db, Client, HealthProgram, client_programs
+from app.utils import dialect_insert
+
+cp = client_programs.c
+
+
+def enroll(client_id, program_ids, enrollment_date=None, notes=None):
+    """Enroll a client in every existing program of ``program_ids`` with one INSERT ... SELECT.
+
+    Unknown client/program ids and existing enrollments are skipped by the
+    statement itself. Returns the program ids actually written.
+    """
+    if not program_ids:
+        return []
+    now = datetime.now()
+    source = (db.select(Client.id, HealthProgram.id,
+                        literal(enrollment_date or now, db.DateTime),
+                        literal(notes, db.Text),
+                        literal(now, db.DateTime))
+              .select_from(Client)
+              .join(HealthProgram, HealthProgram.id.in_(program_ids))
+              .where(Client.id == client_id))
+    # Python-side column defaults aren't applied to INSERT ... SELECT
+    columns = ['client_id', 'program_id', 'enrollment_date', 'notes', 'updated_at']
+
+    insert_ignore = dialect_insert(db.session)
+    if insert_ignore is not None:
+        stmt = (insert_ignore(client_programs).from_select(columns, source)
+                .on_conflict_do_nothing(index_elements=['client_id', 'program_id'])
+                .returning(cp.program_id))
+        return list(db.session.execute(stmt).scalars())
+
+    # Other backends: exclude existing pairs in the SELECT and report what was eligible
+    source = source.where(~db.select(cp.program_id).where(
+        cp.client_id == client_id, cp.program_id == HealthProgram.id).exists())
+    written = list(db.session.execute(source.with_only_columns(HealthProgram.id)).scalars())
+    if written:
+        db.session.execute(insert(client_programs).from_select(columns, source))
+    return written
+
+
+def unenroll(client_id, program_ids=None, keep_program_ids=None):
+    """Delete a client's enrollments in ``program_ids`` (or all but ``keep_program_ids``).
+
+    Tombstones for the change feed are written in the same transaction.
+    Returns the program ids removed.
+    """
+    if program_ids is not None and not program_ids:
+        return []
+    conditions = [cp.client_id == client_id]
+    if program_ids is not None:
+        conditions.append(cp.program_id.in_(program_ids))
+    if keep_program_ids is not None:
+        conditions.append(cp.program_id.not_in(keep_program_ids))
+    stmt = db.delete(client_programs).where(*conditions)
+
+    if dialect_insert(db.session) is not None:
+        removed = list(db.session.execute(stmt.returning(cp.program_id)).scalars())
+    else:
+        removed = list(db.session.execute(db.select(cp.program_id).where(*conditions)).scalars())
+        if removed:
+            db.session.execute(stmt)
+    changes.record_deletes('enrollment', [(client_id, pid) for pid in removed])
+    return removed
+
+
+def existence(client_id, program_id=None):
+    """Return (client exists, program exists) with a single statement."""
+    client_exists = db.select(Client.id).where(Client.id == client_id).exists()
+    if program_id is None:
+        return db.session.execute(db.select(client_exists)).scalar(), None
+    program_exists = db.select(HealthProgram.id).where(HealthProgram.id == program_id).exists()
+    return tuple(db.session.execute(db.select(client_exists, program_exists)).one())
@@ -0,0 +1,84 @@
+"""Client export queries and row formatting, shared by /exports and export jobs."""
+import csv
+import io
+from app.models import db, Client, HealthProgram, client_programs
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_YIELD_PER = 2000
+
+CLIENT_COLUMNS = ('first_name', 'last_name', 'email', 'date_of_birth', 'gender',
+                  'phone_number', 'address', 'created_at')
+CSV_HEADER = ('client_id',) + CLIENT_COLUMNS + ('program_id', 'program_name', 'enrollment_date', 'notes')
+
+
+def export_query(program_id=None, created_from=None, created_to=None):
+    """One row per enrollment (or per client without enrollments), ordered by client."""
+    columns = [Client.id.label('client_id')] + [getattr(Client, c) for c in CLIENT_COLUMNS] + [
+        client_programs.c.program_id,
+        HealthProgram.name.label('program_name'),
+        client_programs.c.enrollment_date,
+        client_programs.c.notes,
+    ]
+    stmt = db.select(*columns).select_from(Client)
+    if program_id is not None:
+        stmt = stmt.join(client_programs, (client_programs.c.client_id == Client.id)
+                         & (client_programs.c.program_id == program_id))
+    else:
+        stmt = stmt.outerjoin(client_programs, client_programs.c.client_id == Client.id)
+    stmt = stmt.outerjoin(HealthProgram, HealthProgram.id == client_programs.c.program_id)
+    if created_from is not None:
+        stmt = stmt.where(Client.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Client.created_at < created_to)
+    return stmt.order_by(Client.id, client_programs.c.program_id)
+
+
+def stream_rows(stmt):
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_YIELD_PER))
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def csv_chunks(stmt):
+    """Yield CSV text for ``stmt``: the header line, then one line per row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line(CSV_HEADER)
+    for row in stream_rows(stmt):
+        yield line([_iso(v) if hasattr(v, 'isoformat') else v for v in row])
+
+
+def group_clients(rows):
+    # Rows arrive ordered by client, so each client is complete once its id changes
+    current = None
+    for row in rows:
+        if current is None or current['id'] != row.client_id:
+            if current is not None:
+                yield current
+            current = {'id': row.client_id, 'enrollments': []}
+            for column in CLIENT_COLUMNS:
+                value = getattr(row, column)
+                current[column] = _iso(value) if hasattr(value, 'isoformat') else value
+        if row.program_id is not None:
+            current['enrollments'].append({
+                'program_id': row.program_id,
+                'program_name': row.program_name,
+                'enrollment_date': _iso(row.enrollment_date),
+                'notes': row.notes,
+            })
+    if current is not None:
+        yield current
@@ -0,0 +1,183 @@
+"""Idempotency-Key support for retried writes.
+
+A client sends ``Idempotency-Key: <opaque string>`` with a POST. The first
+request reserves the key, runs the view and stores a 2xx response. A retry
+with the same key and body gets that response back, marked with
+``Idempotent-Replayed: true``, and does not run the view again. Completed
+keys are served from an in-process LRU first. The ``idempotency_keys`` table
+is shared across workers and survives restarts. Both expire after
+IDEMPOTENCY_TTL seconds.
+
+The reservation, the view's own transaction and the stored response are
+three separate commits. A reservation whose view never committed (e.g. its
+worker died first) only blocks retries for IDEMPOTENCY_LEASE seconds; after
+that the next retry takes the key over and runs the view. The view's commit
+also extends the reservation to IDEMPOTENCY_TTL, in the same transaction as
+the write. So if the process dies after the write but before the response is
+stored, retries get 409 until the key expires rather than repeating the write.
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import Response, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app.cache import LRUCache
+from app.models import db, IdempotencyKey
+from app.session import RoutingSession
+from app.utils import dialect_insert
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Expired rows are swept at most this often per process
+PURGE_INTERVAL = 300
+
+
+def _ttl_expiry():
+    return datetime.now() + timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+
+
+def _claim_on_commit(session):
+    """Session ``before_commit`` hook: the first commit inside an idempotent view
+    turns its key's lease into a full reservation, atomically with the write."""
+    if not has_request_context() or g.get('idempotency_pending') is None:
+        return
+    key, g.idempotency_pending = g.idempotency_pending, None
+    g.idempotency_committed = True
+    session.execute(db.update(IdempotencyKey).where(IdempotencyKey.key == key)
+                    .values(expires_at=_ttl_expiry()))
+
+
+class IdempotencyStore:
+    """LRU of completed responses in front of the ``idempotency_keys`` table."""
+
+    def init_app(self, app):
+        app.extensions['idempotency'] = {
+            'lru': LRUCache(max_entries=app.config['IDEMPOTENCY_MAX_ENTRIES'],
+                            default_ttl=app.config['IDEMPOTENCY_TTL']),
+            'next_purge': 0.0,
+        }
+        if not event.contains(RoutingSession, 'before_commit', _claim_on_commit):
+            event.listen(RoutingSession, 'before_commit', _claim_on_commit)
+
+    @property
+    def _state(self):
+        return current_app.extensions['idempotency']
+
+    def _reserve(self, key, fingerprint):
+        """Insert a pending row for ``key``. Returns False if one already exists."""
+        # Pending rows expire after the lease; completion extends them to the TTL
+        expires_at = datetime.now() + timedelta(seconds=current_app.config['IDEMPOTENCY_LEASE'])
+        values = {'key': key, 'fingerprint': fingerprint, 'expires_at': expires_at}
+        insert_ignore = dialect_insert(db.session)
+        if insert_ignore is not None:
+            stmt = insert_ignore(IdempotencyKey).values(**values) \
+                .on_conflict_do_nothing(index_elements=['key']).returning(IdempotencyKey.key)
+            reserved = db.session.execute(stmt).scalar() is not None
+        else:
+            try:
+                db.session.execute(db.insert(IdempotencyKey).values(**values))
+                reserved = True
+            except IntegrityError:
+                db.session.rollback()
+                return False
+        db.session.commit()
+        return reserved
+
+    def _load(self, key):
+        row = db.session.execute(
+            db.select(IdempotencyKey.fingerprint, IdempotencyKey.status_code,
+                      IdempotencyKey.body, IdempotencyKey.expires_at)
+            .where(IdempotencyKey.key == key)
+        ).one_or_none()
+        now = datetime.now()
+        if row is not None and row.expires_at < now:
+            # Conditional, so a reservation another retry just made isn't deleted
+            db.session.execute(db.delete(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.expires_at < now))
+            db.session.commit()
+            return None
+        return row
+
+    def _release(self, key):
+        db.session.rollback()
+        db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        db.session.commit()
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        if now < self._state['next_purge']:
+            return
+        self._state['next_purge'] = now + PURGE_INTERVAL
+        db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now()))
+        db.session.commit()
+
+    def _replay(self, entry, fingerprint):
+        stored_fingerprint, status, body = entry
+        if stored_fingerprint != fingerprint:
+            return jsonify({'error': f'{HEADER} was already used with a different request'}), 422
+        response = Response(body, status=status, mimetype='application/json')
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def handle(self, key, fingerprint, view):
+        """Replay the stored response for ``key`` or run ``view()`` and store its result."""
+        lru = self._state['lru']
+        entry = lru.get(key)
+        if entry is not None:
+            return self._replay(entry, fingerprint)
+
+        self._purge_expired()
+        while not self._reserve(key, fingerprint):
+            row = self._load(key)
+            if row is None:
+                continue  # expired, lease lapsed or released; try to reserve it again
+            if row.status_code is None:
+                return jsonify({'error': f'A request with this {HEADER} is still in progress'}), 409
+            entry = (row.fingerprint, row.status_code, row.body)
+            lru.set(key, entry)
+            return self._replay(entry, fingerprint)
+
+        g.idempotency_pending, g.idempotency_committed = key, False
+        try:
+            response = current_app.make_response(view())
+        except BaseException:
+            g.idempotency_pending = None
+            if not g.idempotency_committed:
+                self._release(key)
+            raise
+        finally:
+            g.idempotency_pending = None
+        # Only successes are kept, as a failed attempt may legitimately succeed
+        # on retry, unless the view already committed a write
+        if not 200 <= response.status_code < 300 and not g.idempotency_committed:
+            self._release(key)
+            return response
+
+        body = response.get_data(as_text=True)
+        db.session.execute(
+            db.update(IdempotencyKey).where(IdempotencyKey.key == key)
+            .values(status_code=response.status_code, body=body, expires_at=_ttl_expiry())
+        )
+        db.session.commit()
+        lru.set(key, (fingerprint, response.status_code, body))
+        return response
+
+
+idempotency = IdempotencyStore()
+
+
+def idempotent(view):
+    """Make a write view replayable via the Idempotency-Key request header."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+        scoped_key = f'{request.method} {request.path} {key}'
+        fingerprint = hashlib.sha1(request.get_data()).hexdigest()
+        return idempotency.handle(scoped_key, fingerprint, lambda: view(*args, **kwargs))
+    return wrapper
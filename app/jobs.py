@@ -0,0 +1,136 @@
+"""In-process background jobs.
+
+Heavy operations are recorded in the ``jobs`` table and run on a thread pool
+owned by the app process, so request workers return ``202`` at once. Clients
+poll ``GET /jobs/<id>`` for status and progress. No external broker is
+involved. CPU-bound job types may fan out further; the duplicate scan uses a
+process pool.
+
+At most JOB_WORKERS jobs run at a time and at most JOB_QUEUE_DEPTH wait.
+Further submissions raise QueueFull. The queue lives in this process, so jobs
+still queued or running when it exits stay in that state in the table.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from app.models import db, Job
+
+# Progress writes are throttled to one per interval
+PROGRESS_INTERVAL = 1.0
+
+JOB_TYPES = {}
+
+
+class QueueFull(Exception):
+    pass
+
+
+def job_type(name):
+    """Register ``fn(job_context, **params) -> result dict`` as a job kind."""
+    def decorator(fn):
+        JOB_TYPES[name] = fn
+        return fn
+    return decorator
+
+
+class JobContext:
+    """Handed to job functions: progress reporting and a per-job output path."""
+
+    def __init__(self, job_id, job_dir):
+        self.job_id = job_id
+        self.job_dir = job_dir
+        self._last_progress = 0.0
+
+    def output_path(self, suffix):
+        return os.path.join(self.job_dir, f'{self.job_id}{suffix}')
+
+    def progress(self, done, total=None, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        values = {'progress': done}
+        if total is not None:
+            values['total'] = total
+        db.session.execute(db.update(Job).where(Job.id == self.job_id).values(**values))
+        db.session.commit()
+
+
+class JobQueue:
+    def init_app(self, app):
+        workers = app.config['JOB_WORKERS']
+        job_dir = app.config['JOB_DIR'] or os.path.join(app.instance_path, 'jobs')
+        app.extensions['jobs'] = {
+            'executor': ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job'),
+            # Running plus waiting jobs
+            'slots': threading.BoundedSemaphore(workers + app.config['JOB_QUEUE_DEPTH']),
+            'dir': job_dir,
+        }
+
+    @property
+    def _state(self):
+        return current_app.extensions['jobs']
+
+    @property
+    def job_dir(self):
+        return self._state['dir']
+
+    def submit(self, kind, **params):
+        """Persist a queued job and schedule it. Raises QueueFull when the queue is at capacity."""
+        if kind not in JOB_TYPES:
+            raise ValueError(f'Unknown job type {kind!r}')
+        state = self._state
+        if not state['slots'].acquire(blocking=False):
+            raise QueueFull('Job queue is full, retry later')
+        try:
+            job = Job(id=uuid.uuid4().hex, kind=kind, status='queued', params=json.dumps(params))
+            db.session.add(job)
+            db.session.commit()
+            os.makedirs(state['dir'], exist_ok=True)
+            state['executor'].submit(self._run, current_app._get_current_object(), job.id, kind, params)
+        except BaseException:
+            state['slots'].release()
+            raise
+        return job
+
+    def _run(self, app, job_id, kind, params):
+        with app.app_context():
+            try:
+                db.session.execute(db.update(Job).where(Job.id == job_id)
+                                   .values(status='running', started_at=datetime.now()))
+                db.session.commit()
+                result = JOB_TYPES[kind](JobContext(job_id, self.job_dir), **params)
+                values = {'status': 'succeeded', 'result': json.dumps(result)}
+            except Exception as e:
+                db.session.rollback()
+                app.logger.exception('Job %s (%s) failed', job_id, kind)
+                values = {'status': 'failed', 'error': str(e)}
+            finally:
+                app.extensions['jobs']['slots'].release()
+            db.session.execute(db.update(Job).where(Job.id == job_id)
+                               .values(finished_at=datetime.now(), **values))
+            db.session.commit()
+
+
+jobs = JobQueue()
+
+
+def job_payload(job):
+    """Public representation of a Job row."""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
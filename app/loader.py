@@ -0,0 +1,42 @@
+"""Batched primary-key loads for the current app context.
+
+Views call ``load(Model, id)`` instead of issuing their own lookup. Ids queued
+earlier with ``want()`` are fetched in the same ``IN`` query; POST /batch
+queues every id its sub-requests mention. Results, including misses, are
+kept for the rest of the app context, so a row is loaded at most once however
+many sub-requests ask for it.
+"""
+from flask import g
+from sqlalchemy.orm import selectinload
+from app.models import db, Client, HealthProgram
+
+# Loaded with every row, so any serializer view of it needs no further query
+LOAD_OPTIONS = {
+    Client: (selectinload(Client.programs).load_only(HealthProgram.id, HealthProgram.name),),
+}
+
+
+def _state():
+    if 'loader' not in g:
+        g.loader = {'pending': {}, 'loaded': {}}
+    return g.loader
+
+
+def want(model, ids):
+    """Queue ``ids`` to be fetched with the next ``load`` of ``model``."""
+    _state()['pending'].setdefault(model, set()).update(ids)
+
+
+def load(model, ident):
+    """Return the ``model`` row with primary key ``ident``, or None."""
+    state = _state()
+    loaded = state['loaded'].setdefault(model, {})
+    if ident not in loaded:
+        ids = state['pending'].pop(model, set()) - loaded.keys()
+        ids.add(ident)
+        rows = db.session.execute(
+            db.select(model).where(model.id.in_(ids)).options(*LOAD_OPTIONS.get(model, ()))
+        ).scalars()
+        loaded.update(dict.fromkeys(ids))
+        loaded.update((row.id, row) for row in rows)
+    return loaded[ident]
@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 25, 50, 100, 250)
+# Statements kept per request for the slow-request log
+MAX_LOGGED_STATEMENTS = 50
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels):
+    return ','.join(f'{k}="{v}"' for k, v in labels.items())
+
+
+class Metrics:
+    """Per-endpoint request latency, SQL and response-size metrics in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.query_counts = {}
+        self.requests = {}
+        self.sql_queries = {}
+        self.sql_seconds = {}
+        self.response_bytes = {}
+
+    def record(self, endpoint, method, status, seconds, queries, sql_seconds, size):
+        key = (endpoint, method)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.query_counts.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(queries)
+            status_key = (endpoint, method, status)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.sql_queries[key] = self.sql_queries.get(key, 0) + queries
+            self.sql_seconds[key] = self.sql_seconds.get(key, 0.0) + sql_seconds
+            if size is not None:
+                self.response_bytes[key] = self.response_bytes.get(key, 0) + size
+
+    def _histogram_lines(self, name, histograms):
+        lines = []
+        for (endpoint, method), hist in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(hist.buckets + ('+Inf',), hist.counts):
+                cumulative += count
+                labels = _labels(endpoint=endpoint, method=method, le=bound)
+                lines.append(f'{name}_bucket{{{labels}}} {cumulative}')
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append(f'{name}_sum{{{labels}}} {hist.sum}')
+            lines.append(f'{name}_count{{{labels}}} {hist.count}')
+        return lines
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP http_request_duration_seconds Request latency by endpoint.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            lines += self._histogram_lines('http_request_duration_seconds', self.latency)
+            lines += [
+                '# HELP http_request_sql_queries SQL statements issued per request.',
+                '# TYPE http_request_sql_queries histogram',
+            ]
+            lines += self._histogram_lines('http_request_sql_queries', self.query_counts)
+            lines += [
+                '# HELP http_requests_total Requests by endpoint and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (endpoint, method, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_labels(endpoint=endpoint, method=method, status=status)}}} {value}')
+            for name, help_text, values in (
+                ('http_request_sql_queries_total', 'SQL statements issued.', self.sql_queries),
+                ('http_request_sql_duration_seconds_total', 'Time spent executing SQL.', self.sql_seconds),
+                ('http_response_size_bytes_total', 'Response bytes with a known length.', self.response_bytes),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (endpoint, method), value in sorted(values.items()):
+                    lines.append(f'{name}{{{_labels(endpoint=endpoint, method=method)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if not has_request_context() or 'sql_queries' not in g:
+        return
+    g.sql_queries += 1
+    g.sql_seconds += elapsed
+    if len(g.sql_statements) < MAX_LOGGED_STATEMENTS:
+        g.sql_statements.append((elapsed, statement))
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for a failed statement; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start_time'):
+        conn.info['query_start_time'].pop()
+
+
+def _start_timer():
+    # POST /batch runs sub-requests in its own app context; their SQL counts toward it
+    if 'request_start_time' in g:
+        return
+    g.request_start_time = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+    g.sql_statements = []
+
+
+def _record(app, stats, endpoint, method, path, status, size):
+    seconds = time.perf_counter() - stats.request_start_time
+    app.extensions['metrics'].record(
+        endpoint, method, status, seconds, stats.sql_queries, stats.sql_seconds, size
+    )
+
+    slow_ms = app.config['SLOW_REQUEST_MS']
+    if slow_ms and seconds * 1000 >= slow_ms:
+        statements = '\n'.join(f'  [{elapsed * 1000:.1f} ms] {statement}'
+                               for elapsed, statement in stats.sql_statements)
+        app.logger.warning(
+            'Slow request %s %s: %.1f ms, %d queries, %.1f ms SQL\n%s',
+            method, path, seconds * 1000, stats.sql_queries, stats.sql_seconds * 1000, statements
+        )
+
+
+def _counted(body, sent):
+    for chunk in body:
+        sent[0] += len(chunk)
+        yield chunk
+
+
+def _record_request(response):
+    if 'request_start_time' not in g:
+        return response
+
+    if current_app.config['METRICS_SERVER_TIMING']:
+        # For streamed bodies this only covers the work done before the first byte
+        seconds = time.perf_counter() - g.request_start_time
+        response.headers.add('Server-Timing', f'db;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_queries} queries"')
+        response.headers.add('Server-Timing', f'total;dur={seconds * 1000:.1f}')
+
+    args = (current_app._get_current_object(), g._get_current_object(), request.endpoint or 'unmatched',
+            request.method, request.full_path, response.status_code)
+    if response.is_streamed:
+        # calculate_content_length() would buffer the whole body. Record once it
+        # has been sent instead, so the SQL the generator runs is counted too.
+        sent = [0]
+        response.response = _counted(response.response, sent)
+        response.call_on_close(lambda: _record(*args, sent[0]))
+    else:
+        _record(*args, response.calculate_content_length())
+    return response
+
+
+def init_metrics(app):
+    """Install request/SQL instrumentation hooks on ``app``."""
+    app.extensions['metrics'] = Metrics()
+    # Cursor events are registered once per process and cover every engine
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
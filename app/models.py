@@ -1,15 +1,26 @@
 # models.py
+import re
+import unicodedata
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from app.normalize import blocking_keys
+from app.session import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Association table for many-to-many relationship between clients and health programs
 client_programs = db.Table('client_programs',
-    db.Column('client_id', db.Integer, db.ForeignKey('clients.id'), primary_key=True),
-    db.Column('program_id', db.Integer, db.ForeignKey('health_programs.id'), primary_key=True),
-    db.Column('enrollment_date', db.DateTime, default=datetime.now),
-    db.Column('notes', db.Text)
+    # Enrollments go with their client or program (see app/deletes.py)
+    db.Column('client_id', db.Integer, db.ForeignKey('clients.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('program_id', db.Integer, db.ForeignKey('health_programs.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('enrollment_date', db.DateTime, nullable=False, default=datetime.now),
+    db.Column('notes', db.Text),
+    db.Column('updated_at', db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now),
+    # Program rosters: filter by program, keyset-paginate on (enrollment_date, client_id)
+    db.Index('ix_client_programs_program_enrollment', 'program_id', 'enrollment_date', 'client_id'),
+    # Change feed (GET /sync) keyset order
+    db.Index('ix_client_programs_updated', 'updated_at', 'client_id', 'program_id')
 )
 
 class HealthProgram(db.Model):
@@ -19,8 +30,17 @@ class HealthProgram(db.Model):
     name = db.Column(db.String(100), unique=True, nullable=False)  # e.g., "TB", "Malaria"
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.now)  
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
     
-    clients = db.relationship('Client', secondary=client_programs, back_populates='programs')
+    # passive_deletes: the database removes enrollment rows, so deleting a
+    # program never loads its enrolled clients
+    clients = db.relationship('Client', secondary=client_programs, back_populates='programs',
+                              passive_deletes=True)
+
+    __table_args__ = (db.Index('ix_health_programs_updated', 'updated_at', 'id'),)
+
+EMAIL_UNIQUE_INDEX = 'uq_clients_email_lower'
+
 
 class Client(db.Model):
     __tablename__ = 'clients'
@@ -34,4 +54,108 @@ class Client(db.Model):
     email = db.Column(db.String(120))
     address = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.now) 
-    programs = db.relationship('HealthProgram', secondary=client_programs, back_populates='clients')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+    # Normalized "first last email" text backing /clients/search
+    search_text = db.Column(db.Text)
+    # Duplicate-detection blocks (see app/dedup.py): "surname soundex:birth year" and phone digits
+    block_key = db.Column(db.String(12), index=True)
+    phone_key = db.Column(db.String(15), index=True)
+    programs = db.relationship('HealthProgram', secondary=client_programs, back_populates='clients',
+                               passive_deletes=True)
+
+    __table_args__ = (
+        db.Index('ix_clients_updated', 'updated_at', 'id'),
+        # One client per email regardless of case; NULLs don't conflict
+        db.Index(EMAIL_UNIQUE_INDEX, db.func.lower(email), unique=True),
+        # Registration-date ranges (exports, reporting)
+        db.Index('ix_clients_created_at', 'created_at'),
+    )
+
+
+# Dashboard rollups, maintained incrementally by the write paths (see app/stats.py)
+class ProgramStats(db.Model):
+    __tablename__ = 'program_stats'
+
+    program_id = db.Column(db.Integer, db.ForeignKey('health_programs.id', ondelete='CASCADE'), primary_key=True)
+    enrollment_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ClientDemographics(db.Model):
+    __tablename__ = 'client_demographics'
+
+    # '' / 0 stand in for unknown gender / birth year so both can be key columns
+    gender = db.Column(db.String(20), primary_key=True)
+    birth_year = db.Column(db.Integer, primary_key=True)
+    client_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Deleted rows, so GET /sync can tell offline clients what to drop
+class Tombstone(db.Model):
+    __tablename__ = 'tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # 'client', 'program' or 'enrollment'
+    entity_id = db.Column(db.Integer, nullable=False)
+    # Program id for enrollments (entity_id is the client)
+    related_id = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (db.Index('ix_tombstones_deleted', 'deleted_at', 'id'),)
+
+
+# Background jobs (see app/jobs.py); params and result are JSON
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # queued, running, succeeded, failed
+    params = db.Column(db.Text)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
+# Stored responses for retried writes carrying an Idempotency-Key (see app/idempotency.py)
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    # "METHOD path key", so one client key can't collide across endpoints
+    key = db.Column(db.String(400), primary_key=True)
+    fingerprint = db.Column(db.String(40), nullable=False)
+    # NULL while the original request is still running
+    status_code = db.Column(db.Integer)
+    body = db.Column(db.Text)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+def normalize_search_text(*parts):
+    """Lowercase, strip accents and collapse whitespace so index lookups are case-insensitive."""
+    text = ' '.join(str(p) for p in parts if p)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Engine ``connect`` hook: SQLite ignores ON DELETE CASCADE unless this pragma is set per connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def is_email_conflict(error):
+    """True if an IntegrityError came from the case-insensitive email index."""
+    return EMAIL_UNIQUE_INDEX in str(error.orig)
+
+
+@event.listens_for(Client, 'before_insert')
+@event.listens_for(Client, 'before_update')
+def _set_derived_columns(mapper, connection, target):
+    target.search_text = normalize_search_text(target.first_name, target.last_name, target.email)
+    for column, value in blocking_keys(target.last_name, target.date_of_birth, target.phone_number).items():
+        setattr(target, column, value)
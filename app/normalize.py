@@ -0,0 +1,65 @@
+"""Pure normalization helpers shared by the models, bulk paths and duplicate detection."""
+import re
+import unicodedata
+
+# Phone numbers are compared on their trailing digits so "+254 712 345 678",
+# "0712345678" and "712-345-678" agree
+PHONE_KEY_DIGITS = 9
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'), 'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+
+def normalize_name(value):
+    """Lowercase ASCII letters only: 'Wéré-Otieno ' -> 'wereotieno'."""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value))
+    return re.sub(r'[^a-z]', '', ''.join(ch for ch in value if not unicodedata.combining(ch)).lower())
+
+
+def normalize_email(value):
+    """Trim surrounding whitespace; blank emails become None so they never collide."""
+    if isinstance(value, str):
+        value = value.strip()
+    return value or None
+
+
+def normalize_phone(value):
+    """Trailing PHONE_KEY_DIGITS digits of a phone number, or None if it has fewer."""
+    # Clients posted as JSON may carry the number itself rather than a string
+    digits = re.sub(r'\D', '', str(value) if value else '')
+    if len(digits) < PHONE_KEY_DIGITS:
+        return None
+    return digits[-PHONE_KEY_DIGITS:]
+
+
+def soundex(value):
+    """American Soundex code of a name ('Robert' -> 'R163'); '' for names without letters."""
+    name = normalize_name(value)
+    if not name:
+        return ''
+    code = name[0].upper()
+    previous = _SOUNDEX_CODES.get(name[0], '')
+    for ch in name[1:]:
+        digit = _SOUNDEX_CODES.get(ch, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # 'h' and 'w' don't separate letters with the same code; vowels do
+        if ch not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def blocking_keys(last_name, date_of_birth, phone_number):
+    """Indexed columns that group likely duplicates: surname code + birth year, and phone."""
+    surname = soundex(last_name)
+    year = date_of_birth.year if date_of_birth else ''
+    return {
+        'block_key': f'{surname}:{year}' if surname else None,
+        'phone_key': normalize_phone(phone_number),
+    }
@@ -0,0 +1,33 @@
+"""Read statements shared by the sync blueprints and the async read path (app/aio.py)."""
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, selectinload
+from app.models import Client, HealthProgram
+from app.serializers import client_serializer
+
+
+def client_page(after_id, limit, fields):
+    # Keyset pagination on the primary key; only the selected columns are
+    # loaded, and programs for the whole page come from a single IN query
+    stmt = select(Client).options(*client_serializer.load_options(fields)).order_by(Client.id)
+    if after_id is not None:
+        stmt = stmt.where(Client.id > after_id)
+    return stmt.limit(limit)
+
+
+def client_profile(client_id, fields):
+    return select(Client).options(*client_serializer.load_options(fields)).where(Client.id == client_id)
+
+
+def client_programs(client_id):
+    return (select(Client)
+            .options(load_only(Client.id),
+                     selectinload(Client.programs).load_only(HealthProgram.id, HealthProgram.name))
+            .where(Client.id == client_id))
+
+
+def program_list():
+    return select(HealthProgram).order_by(HealthProgram.id)
+
+
+def program(program_id):
+    return select(HealthProgram).where(HealthProgram.id == program_id)
@@ -0,0 +1,93 @@
+import json
+from urllib.parse import urlsplit
+from flask import Blueprint, current_app, g, jsonify, request
+from werkzeug.exceptions import HTTPException
+from app import loader
+from app.models import db, Client, HealthProgram
+
+batch_bp = Blueprint('batch_bp', __name__)
+
+# Blueprints whose GET routes may be called from a batch
+BATCH_BLUEPRINTS = ('client_bp', 'program_bp')
+# Path parameters whose rows are prefetched with one IN query per model
+PREFETCH_ARGS = {'client_id': Client, 'program_id': HealthProgram}
+
+
+def _error(status, message):
+    return {'status': status, 'body': {'error': message}}
+
+
+def _match(adapter, sub):
+    """Resolve a sub-request to (endpoint, view_args), or return an error result."""
+    if not isinstance(sub, dict) or not isinstance(sub.get('path'), str):
+        return _error(400, 'Each request needs a "path" string')
+    if sub.get('method', 'GET').upper() != 'GET':
+        return _error(405, 'Only GET requests can be batched')
+    try:
+        endpoint, view_args = adapter.match(urlsplit(sub['path']).path, method='GET')
+    except HTTPException as e:
+        return _error(e.code, e.description)
+    if endpoint.split('.', 1)[0] not in BATCH_BLUEPRINTS:
+        return _error(400, f"{sub['path']} can't be batched")
+    return endpoint, view_args
+
+
+def _dispatch(sub, endpoint, view_args):
+    """Run one view in its own request context, sharing this app context and session.
+
+    The app and blueprint before_request hooks run as for a normal request;
+    after_request hooks don't, since the batch response goes through them once.
+    """
+    headers = sub.get('headers') if isinstance(sub.get('headers'), dict) else {}
+    # Bodies are embedded in the batch response as JSON, so they must stay uncompressed
+    headers = {k: v for k, v in headers.items() if k.lower() != 'accept-encoding'}
+    with current_app.test_request_context(sub['path'], method='GET', headers=headers):
+        try:
+            rv = current_app.preprocess_request()
+            if rv is None:
+                view = current_app.ensure_sync(current_app.view_functions[endpoint])
+                rv = view(**view_args)
+            response = current_app.make_response(rv)
+            if response.is_streamed:
+                # e.g. the unpaginated GET /clients; reading it would load the whole table
+                response.close()
+                return _error(400, f"{sub['path']} streams its response and can't be batched; "
+                                   'request a page instead')
+            data = response.get_data(as_text=True)
+        except HTTPException as e:
+            return _error(e.code, e.description)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('Batched request %s failed', sub['path'])
+            return _error(500, 'Internal server error')
+
+    result = {'status': response.status_code}
+    if response.headers.get('ETag'):
+        result['headers'] = {'ETag': response.headers['ETag']}
+    if data:
+        result['body'] = json.loads(data) if response.is_json else data
+    return result
+
+
+# Route to run several GET requests against the client and program routes in one round trip
+@batch_bp.route('/batch', methods=['POST'])
+def run_batch():
+    data = request.get_json(silent=True) or {}
+    subs = data.get('requests')
+    limit = current_app.config['BATCH_MAX_REQUESTS']
+    if not isinstance(subs, list) or not subs:
+        return jsonify({'error': 'requests must be a non-empty array'}), 400
+    if len(subs) > limit:
+        return jsonify({'error': f'At most {limit} requests per batch'}), 400
+
+    adapter = current_app.url_map.bind_to_environ(request.environ)
+    matches = [_match(adapter, sub) for sub in subs]
+    # Queue every id the batch mentions, so the first load of each model fetches them all
+    for arg, model in PREFETCH_ARGS.items():
+        loader.want(model, {m[1][arg] for m in matches if isinstance(m, tuple) and arg in m[1]})
+
+    # Everything below is a read
+    g.use_replica = True
+    responses = [_dispatch(sub, *match) if isinstance(match, tuple) else match
+                 for sub, match in zip(subs, matches)]
+    return jsonify({'responses': responses}), 200
@@ -1,10 +1,33 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from collections import Counter
 from datetime import datetime
-from app.models import db, Client, HealthProgram
+from types import SimpleNamespace
+from sqlalchemy.exc import IntegrityError
+from app.session import route_reads_to_replica
+from app.models import db, Client, HealthProgram, client_programs, is_email_conflict, normalize_search_text
+from app.search import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, search_clients as find_clients
+from app.streaming import ndjson_response, json_array_response
+from app.bulk import iter_ndjson, register_clients
+from app.cache import cache
+from app.conditional import clients_version, conditional
+from app.idempotency import idempotent
+from app.normalize import blocking_keys, normalize_email
+from app.utils import extract_program_ids, parse_datetime, parse_id_list
+from app import dedup, deletes, enrollments, loader, queries, stats
+from app.serializers import client_serializer, program_ref_serializer, CLIENT_SUMMARY_FIELDS
 
 client_bp = Blueprint('client_bp', __name__)
+client_bp.before_request(route_reads_to_replica)
+
+REGISTER_FIELDS = ('id', 'first_name', 'last_name', 'email', 'date_of_birth',
+                   'gender', 'phone_number', 'address', 'programs')
+UPDATE_FIELDS = ('id', 'first_name', 'last_name', 'email', 'date_of_birth', 'programs')
+# Columns PUT /clients/<id> may change
+EDITABLE_FIELDS = ('first_name', 'last_name', 'email', 'date_of_birth',
+                   'gender', 'phone_number', 'address')
 
 @client_bp.route('/clients', methods=['POST'])
+@idempotent
 def register_client():
     data = request.get_json()
     
@@ -14,11 +37,6 @@ def register_client():
         if not data.get(field):
             return jsonify({'error': f'{field} is required'}), 400
         
-    # Email uniqueness check
-    if 'email' in data and data['email']:
-        if Client.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Client with this email already exists'}), 409
-
     # Date parsing with better error handling
     dob = None
     if 'date_of_birth' in data and data['date_of_birth']:
@@ -36,15 +54,7 @@ def register_client():
     if 'programs' in data:
         if isinstance(data['programs'], list):
             # Extract IDs whether we get objects or direct IDs
-            program_ids = []
-            for p in data['programs']:
-                if isinstance(p, dict) and 'id' in p:
-                    program_ids.append(p['id'])
-                elif isinstance(p, (int, str)):
-                    try:
-                        program_ids.append(int(p))
-                    except ValueError:
-                        continue
+            program_ids = extract_program_ids(data['programs'])
             
             # Get all valid programs
             programs = HealthProgram.query.filter(HealthProgram.id.in_(program_ids)).all()
@@ -58,7 +68,7 @@ def register_client():
         date_of_birth=dob,
         gender=data.get('gender'),
         phone_number=data.get('phone_number'),
-        email=data.get('email'),
+        email=normalize_email(data.get('email')),
         address=data.get('address')
     )
 
@@ -68,25 +78,21 @@ def register_client():
 
     try:
         db.session.add(client)
+        stats.record_enrollments(Counter(p.id for p in programs))
+        stats.record_clients({stats.demographic_key(client.gender, dob): 1})
         db.session.commit()
         
       
-        client_data = {
-            'id': client.id,
-            'first_name': client.first_name,
-            'last_name': client.last_name,
-            'email': client.email,
-            'date_of_birth': client.date_of_birth.isoformat() if client.date_of_birth else None,
-            'gender': client.gender,
-            'phone_number': client.phone_number,
-            'address': client.address,
-            'programs': [{'id': p.id, 'name': p.name} for p in client.programs]
-        }
-        
         return jsonify({
             'message': 'Client registered successfully',
-            'client': client_data
+            'client': client_serializer.dump(client, REGISTER_FIELDS)
         }), 201
+    except IntegrityError as e:
+        # The unique index decides; no pre-query, and concurrent registrations can't both win
+        db.session.rollback()
+        if is_email_conflict(e):
+            return jsonify({'error': 'Client with this email already exists'}), 409
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -95,27 +101,91 @@ def register_client():
         }), 500
 
 
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 1000
+# Rows loaded per round trip when streaming the full client list
+LIST_STREAM_CHUNK = 500
+# Blocks compared per GET /clients/duplicates page
+DUPLICATE_PAGE_SIZE = 100
+DUPLICATE_MAX_PAGE_SIZE = 1000
+
+
+def _client_page(after_id, limit, fields):
+    return db.session.execute(queries.client_page(after_id, limit, fields)).scalars().all()
+
+
+def _iter_clients(fields, after_id=None, chunk_size=LIST_STREAM_CHUNK):
+    serialize = client_serializer.compile(fields)
+    while True:
+        page = _client_page(after_id, chunk_size, fields)
+        if not page:
+            return
+        for c in page:
+            yield serialize(c)
+        after_id = page[-1].id
+        # Drop loaded rows from the session so memory stays flat across chunks
+        db.session.expunge_all()
+        if len(page) < chunk_size:
+            return
+
+
+# Route to register many clients at once (JSON array or NDJSON stream)
+@client_bp.route('/clients/bulk', methods=['POST'])
+def register_clients_bulk():
+    if request.mimetype == 'application/x-ndjson':
+        records = iter_ndjson(request.stream)
+    else:
+        records = request.get_json(silent=True)
+        if not isinstance(records, list):
+            return jsonify({'error': 'Request body must be a JSON array of clients'}), 400
+
+    results = register_clients(records, chunk_size=current_app.config['BULK_CHUNK_SIZE'])
+    created = sum(1 for r in results if r['status'] == 'created')
+
+    return jsonify({
+        'created': created,
+        'failed': len(results) - created,
+        'results': results
+    }), 201 if created == len(results) else 207
+
+
 # Route to list all clients
 @client_bp.route('/clients', methods=['GET'])
+@conditional(clients_version)
 def list_clients():
+    after_id = request.args.get('after_id', type=int)
+    limit = request.args.get('limit', type=int)
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'ndjson'):
+        return jsonify({'error': 'format must be "json" or "ndjson"'}), 400
+    try:
+        fields = client_serializer.from_request()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
-        clients = Client.query.all()
-        client_list = []
-        for c in clients:
-            client_data = {
-                'id': c.id,
-                'first_name': c.first_name,
-                'last_name': c.last_name,
-                'email': c.email,
-                'date_of_birth': c.date_of_birth,
-                'gender': c.gender,
-                'phone_number': c.phone_number,
-                'address': c.address,
-                'created_at': c.created_at,
-                'programs': [{'id': p.id, 'name': p.name} for p in c.programs]
-            }
-            client_list.append(client_data)
-        return jsonify(client_list), 200
+        # Without paging parameters the whole table is streamed in chunks
+        if after_id is None and limit is None:
+            if fmt == 'ndjson':
+                return ndjson_response(_iter_clients(fields))
+            return json_array_response(_iter_clients(fields))
+
+        if limit is None:
+            limit = LIST_PAGE_SIZE
+        if limit < 1:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
+        limit = min(limit, LIST_MAX_PAGE_SIZE)
+
+        page = _client_page(after_id, limit, fields)
+        client_list = client_serializer.dump_many(page, fields)
+        if fmt == 'ndjson':
+            return ndjson_response(client_list)
+
+        next_after_id = page[-1].id if len(page) == limit else None
+        return jsonify({
+            'clients': client_list,
+            'next_after_id': next_after_id
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -127,119 +197,130 @@ def enroll_client(client_id):
     if not program_ids or not isinstance(program_ids, list):
         return jsonify({'error': 'Program/s id is required'}), 400
 
-    client = Client.query.get(client_id)
-    if not client:
+    added = enrollments.enroll(client_id, program_ids)
+    if not added and not enrollments.existence(client_id)[0]:
         return jsonify({'error': 'Client not found'}), 404
 
-    from app.models import HealthProgram 
-    for pid in program_ids:
-        program = HealthProgram.query.get(pid)
-        if program and program not in client.programs:
-            client.programs.append(program)
-
+    stats.record_enrollments(Counter(added))
     db.session.commit()
+    cache.invalidate_clients([client_id])
 
     return jsonify({'message': 'Client enrolled in programs'}), 200
 
 # Route to get a client's profile
 @client_bp.route('/clients/<int:client_id>', methods=['GET'])
 def get_client_profile(client_id):
-    client = Client.query.get(client_id)
-    if not client:
-        return jsonify({'error': 'Client not found'}), 404
+    try:
+        fields = client_serializer.from_request()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    return jsonify({
-        'id': client.id,
-        'first_name': client.first_name,
-        'last_name': client.last_name,
-        'email': client.email,
-        'date_of_birth': client.date_of_birth,
-        'gender': client.gender,
-        'phone_number': client.phone_number,
-        'address': client.address,
-        'created_at': client.created_at,
-        'programs': [{'id': p.id, 'name': p.name} for p in client.programs]
-    }), 200
+    def build():
+        if 'fields' in request.args:
+            client = db.session.execute(queries.client_profile(client_id, fields)).scalar()
+        else:
+            client = loader.load(Client, client_id)
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
+        return client_serializer.dump(client, fields), 200
+
+    # Only the full profile is cached; field subsets are cheap to load directly
+    if 'fields' in request.args:
+        return build()
+    return cache.json_response(cache.client_key(client_id), build)
 
 @client_bp.route('/clients/<int:client_id>', methods=['PUT'])
 def update_client_profile(client_id):
     data = request.get_json()
-    client = Client.query.get(client_id)
-    
-    if not client:
+
+    # One round trip for the current row and its programs; everything below is a set diff
+    rows = db.session.execute(
+        db.select(Client.first_name, Client.last_name, Client.email, Client.date_of_birth,
+                  Client.gender, Client.phone_number, HealthProgram.id, HealthProgram.name)
+        .outerjoin(client_programs, client_programs.c.client_id == Client.id)
+        .outerjoin(HealthProgram, HealthProgram.id == client_programs.c.program_id)
+        .where(Client.id == client_id)
+        .order_by(HealthProgram.id)
+    ).all()
+    if not rows:
         return jsonify({'error': 'Client not found'}), 404
 
-    try:
-        # Handle program updates if present
-        if 'programs' in data:
-            if not isinstance(data['programs'], list):
-                return jsonify({'error': 'Programs must be provided as an array'}), 400
-                
-            # Extract program IDs
-            program_ids = []
-            for item in data['programs']:
-                if isinstance(item, dict) and 'id' in item:
-                    program_ids.append(item['id'])
-                elif isinstance(item, (int, str)):
-                    try:
-                        program_ids.append(int(item))
-                    except ValueError:
-                        continue
-            
-            # Verify all programs exist
-            existing_programs = HealthProgram.query.filter(HealthProgram.id.in_(program_ids)).all()
-            if len(existing_programs) != len(program_ids):
-                found_ids = {p.id for p in existing_programs}
-                missing_ids = [pid for pid in program_ids if pid not in found_ids]
+    first_name, last_name, email, date_of_birth, gender, phone_number = rows[0][:6]
+    current = {r[6]: r[7] for r in rows if r[6] is not None}
+    old = {'first_name': first_name, 'last_name': last_name, 'email': email,
+           'date_of_birth': date_of_birth, 'gender': gender, 'phone_number': phone_number}
+
+    values = {}
+    for key in EDITABLE_FIELDS:
+        if key not in data:
+            continue
+        value = data[key]
+        if key == 'date_of_birth' and isinstance(value, str):
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
                 return jsonify({
-                    'error': 'Some programs not found',
-                    'missing_program_ids': missing_ids
-                }), 404
-            
-            # Update programs 
-            current_program_ids = {p.id for p in client.programs}
-            new_program_ids = set(program_ids)
-            
-            # Remove programs not in new set
-            for program in list(client.programs):  # Create a copy to iterate over
-                if program.id not in new_program_ids:
-                    client.programs.remove(program)
-            
-            # Add programs not in current set
-            for program in existing_programs:
-                if program.id not in current_program_ids:
-                    client.programs.append(program)
-
-        # Update other fields
-        for key, value in data.items():
-            if key != 'programs' and hasattr(client, key):
-                # Special handling for date_of_birth if needed
-                if key == 'date_of_birth' and isinstance(value, str):
-                    try:
-                        value = datetime.strptime(value, '%Y-%m-%d').date()
-                    except ValueError:
-                        return jsonify({
-                            'error': f'Invalid date format for {key}. Use YYYY-MM-DD'
-                        }), 400
-                setattr(client, key, value)
+                    'error': f'Invalid date format for {key}. Use YYYY-MM-DD'
+                }), 400
+        elif key == 'email':
+            value = normalize_email(value)
+        values[key] = value
+    new = {**old, **values}
+
+    programs = current
+    if 'programs' in data:
+        if not isinstance(data['programs'], list):
+            return jsonify({'error': 'Programs must be provided as an array'}), 400
+
+        program_ids = extract_program_ids(data['programs'])
+        programs = dict(db.session.execute(
+            db.select(HealthProgram.id, HealthProgram.name)
+            .where(HealthProgram.id.in_(program_ids))
+            .order_by(HealthProgram.id)
+        ).all())
+        missing_ids = [pid for pid in program_ids if pid not in programs]
+        if missing_ids:
+            return jsonify({
+                'error': 'Some programs not found',
+                'missing_program_ids': missing_ids
+            }), 404
 
+    try:
+        if values:
+            # Core UPDATE skips the mapper listener that maintains the derived columns
+            values['search_text'] = normalize_search_text(new['first_name'], new['last_name'], new['email'])
+            values.update(blocking_keys(new['last_name'], new['date_of_birth'], new['phone_number']))
+            db.session.execute(
+                db.update(Client).where(Client.id == client_id).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+
+        removed = enrollments.unenroll(client_id, program_ids=list(current.keys() - programs.keys()))
+        added = enrollments.enroll(client_id, list(programs.keys() - current.keys()))
+        program_deltas = Counter(added)
+        program_deltas.subtract(removed)
+        stats.record_enrollments(program_deltas)
+
+        old_demographics = stats.demographic_key(old['gender'], old['date_of_birth'])
+        new_demographics = stats.demographic_key(new['gender'], new['date_of_birth'])
+        if new_demographics != old_demographics:
+            stats.record_clients({old_demographics: -1, new_demographics: 1})
         db.session.commit()
-        
-        # Return updated client data
-        client_data = {
-            'id': client.id,
-            'first_name': client.first_name,
-            'last_name': client.last_name,
-            'email': client.email,
-            'date_of_birth': client.date_of_birth.isoformat() if client.date_of_birth else None,
-            'programs': [{'id': p.id, 'name': p.name} for p in client.programs]
-        }
-        
+        cache.invalidate_clients([client_id])
+
+        client = SimpleNamespace(id=client_id, **new, programs=[
+            SimpleNamespace(id=pid, name=name) for pid, name in sorted(programs.items())
+        ])
         return jsonify({
             'message': 'Client updated successfully',
-            'client': client_data
+            'client': client_serializer.dump(client, UPDATE_FIELDS)
         }), 200
 
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_email_conflict(e):
+            return jsonify({'error': 'Client with this email already exists'}), 409
+        return jsonify({'error': 'Failed to update client', 'details': str(e)}), 500
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -251,59 +332,86 @@ def update_client_profile(client_id):
 # Route to delete a client
 @client_bp.route('/clients/<int:client_id>', methods=['DELETE'])
 def delete_client(client_id):
-    client = Client.query.get(client_id)
-    if not client:
+    # Set-based: the client and its enrollments go without loading either
+    if not deletes.delete_clients([client_id]):
         return jsonify({'error': 'Client not found'}), 404
-
-    db.session.delete(client)
     db.session.commit()
+    cache.invalidate_clients([client_id])
 
     return jsonify({'message': 'Client deleted'}), 200
 
+
+# Route to delete many clients by id list or by filter
+@client_bp.route('/clients', methods=['DELETE'])
+def delete_clients_bulk():
+    data = request.get_json(silent=True) or {}
+    filters = {key: data.get(key) for key in ('program_id', 'created_from', 'created_to')
+               if data.get(key) is not None}
+    if ('client_ids' in data) == bool(filters):
+        return jsonify({'error': 'Provide either client_ids or at least one of '
+                                 'program_id, created_from, created_to'}), 400
+
+    chunk_size = current_app.config['BULK_CHUNK_SIZE']
+    if 'client_ids' in data:
+        try:
+            client_ids = parse_id_list(data['client_ids'])
+        except ValueError as e:
+            return jsonify({'error': f'client_ids {e}'}), 400
+        return jsonify(deletes.bulk_delete_clients(client_ids=client_ids, chunk_size=chunk_size)), 200
+
+    try:
+        conditions = deletes.client_filters(
+            program_id=int(filters['program_id']) if 'program_id' in filters else None,
+            created_from=parse_datetime(filters.get('created_from')),
+            created_to=parse_datetime(filters.get('created_to')),
+        )
+    except (TypeError, ValueError):
+        return jsonify({'error': 'program_id must be an integer and created_from/created_to ISO 8601'}), 400
+    result = deletes.bulk_delete_clients(conditions=conditions, chunk_size=chunk_size)
+    del result['missing_client_ids']
+    return jsonify(result), 200
+
 # Route to get all programs a client is enrolled in
 @client_bp.route('/clients/<int:client_id>/programs', methods=['GET'])
 def get_client_programs(client_id):
-    client = Client.query.get(client_id)
-    if not client:
-        return jsonify({'error': 'Client not found'}), 404
+    def build():
+        client = loader.load(Client, client_id)
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
 
-    programs = [{'id': p.id, 'name': p.name} for p in client.programs]
-    return jsonify({'programs': programs}), 200
+        return {'programs': program_ref_serializer.dump_many(client.programs)}, 200
+
+    return cache.json_response(cache.client_programs_key(client_id), build)
 
 # Route to remove a client from a specific program
 @client_bp.route('/clients/<int:client_id>/programs/<int:program_id>', methods=['DELETE'])
 def remove_client_program(client_id, program_id):
-    client = Client.query.get(client_id)
-    if not client:
-        return jsonify({'error': 'Client not found'}), 404
-
-    from app.models import HealthProgram 
-    program = HealthProgram.query.get(program_id)
-    if not program or program not in client.programs:
+    if not enrollments.unenroll(client_id, program_ids=[program_id]):
+        if not enrollments.existence(client_id)[0]:
+            return jsonify({'error': 'Client not found'}), 404
         return jsonify({'error': 'Program not found or not enrolled'}), 404
 
-    client.programs.remove(program)
+    stats.record_enrollments({program_id: -1})
     db.session.commit()
+    cache.invalidate_clients([client_id])
 
     return jsonify({'message': 'Program removed from client'}), 200
 
 # Route to enroll a client in a specific program
 @client_bp.route('/clients/<int:client_id>/programs/<int:program_id>', methods=['POST'])
+@idempotent
 def enroll_client_in_program(client_id, program_id):
-    client = Client.query.get(client_id)
-    if not client:
-        return jsonify({'error': 'Client not found'}), 404
-
-    from app.models import HealthProgram 
-    program = HealthProgram.query.get(program_id)
-    if not program:
-        return jsonify({'error': 'Program not found'}), 404
-
-    if program in client.programs:
+    if not enrollments.enroll(client_id, [program_id]):
+        client_exists, program_exists = enrollments.existence(client_id, program_id)
+        if not client_exists:
+            return jsonify({'error': 'Client not found'}), 404
+        if not program_exists:
+            return jsonify({'error': 'Program not found'}), 404
         return jsonify({'message': 'Client already enrolled in this program'}), 200
 
-    client.programs.append(program)
+    stats.record_enrollments({program_id: 1})
     db.session.commit()
+    cache.invalidate_clients([client_id])
 
     return jsonify({'message': 'Client enrolled in program'}), 200
 
@@ -314,23 +422,41 @@ def search_clients():
     if not query:
         return jsonify({'error': 'Query parameter "q" is required'}), 400
 
-    clients = Client.query.filter(
-        (Client.first_name.ilike(f'%{query}%')) |
-        (Client.last_name.ilike(f'%{query}%')) |
-        (Client.email.ilike(f'%{query}%'))
-    ).all()
+    limit = request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+    limit = min(limit, SEARCH_MAX_LIMIT)
+
+    clients = find_clients(query, limit=limit, offset=offset)
 
     if not clients:
         return jsonify({'message': 'No clients found matching the search criteria'}), 404
 
-    serialized_clients = [
-        {
-            'id': client.id,
-            'first_name': client.first_name,
-            'last_name': client.last_name,
-            'email': client.email
-        }
-        for client in clients
-    ]
-
-    return jsonify(serialized_clients), 200
\ No newline at end of file
+    return jsonify(client_serializer.dump_many(clients, CLIENT_SUMMARY_FIELDS)), 200
+
+# Route to list likely duplicate clients, one page of blocks at a time
+@client_bp.route('/clients/duplicates', methods=['GET'])
+def find_duplicate_clients():
+    threshold = request.args.get('threshold', dedup.DEFAULT_THRESHOLD, type=float)
+    if not 0 < threshold <= 1:
+        return jsonify({'error': 'threshold must be between 0 and 1'}), 400
+
+    client_id = request.args.get('client_id', type=int)
+    if client_id is not None:
+        matches = dedup.candidates_for(client_id, threshold)
+        if matches is None:
+            return jsonify({'error': 'Client not found'}), 404
+        return jsonify({'client_id': client_id, 'duplicates': matches}), 200
+
+    by = request.args.get('by', 'name')
+    if by not in dedup.BLOCK_COLUMNS:
+        return jsonify({'error': f"by must be one of: {', '.join(dedup.BLOCK_COLUMNS)}"}), 400
+    limit = request.args.get('limit', DUPLICATE_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    pairs, skipped, next_after = dedup.duplicate_page(
+        by, request.args.get('after'), min(limit, DUPLICATE_MAX_PAGE_SIZE), threshold
+    )
+    return jsonify({'duplicates': pairs, 'skipped_blocks': skipped, 'next_after': next_after}), 200
@@ -0,0 +1,53 @@
+from flask import Blueprint, request, jsonify, current_app
+from app.bulk import enroll_clients
+from app.utils import parse_datetime, parse_id_list
+
+enrollment_bp = Blueprint('enrollment_bp', __name__)
+
+
+def _parse_enrollments(data):
+    """Build enrollment rows from either an explicit list or client_ids x program_ids."""
+    enrollment_date = parse_datetime(data.get('enrollment_date'))
+    notes = data.get('notes')
+
+    if 'enrollments' in data:
+        items = data['enrollments']
+        if not isinstance(items, list) or not items:
+            raise ValueError('enrollments must be a non-empty array')
+        rows = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError('each enrollment must be an object')
+            try:
+                client_id, program_id = int(item['client_id']), int(item['program_id'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('each enrollment needs integer client_id and program_id')
+            rows.append({
+                'client_id': client_id,
+                'program_id': program_id,
+                'enrollment_date': parse_datetime(item.get('enrollment_date')) or enrollment_date,
+                'notes': item.get('notes', notes),
+            })
+        return rows
+
+    client_ids = parse_id_list(data.get('client_ids'))
+    program_ids = parse_id_list(data.get('program_ids'))
+    return ({'client_id': cid, 'program_id': pid,
+             'enrollment_date': enrollment_date, 'notes': notes}
+            for pid in program_ids for cid in client_ids)
+
+
+# Route to enroll many clients in many programs in one call
+@enrollment_bp.route('/enrollments/bulk', methods=['POST'])
+def bulk_enroll():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+
+    try:
+        rows = _parse_enrollments(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    result = enroll_clients(rows, chunk_size=current_app.config['BULK_CHUNK_SIZE'])
+    return jsonify(result), 200
@@ -0,0 +1,48 @@
+from flask import Blueprint, request, jsonify
+from app import loader
+from app.exports import csv_chunks, export_query, group_clients, stream_rows
+from app.models import HealthProgram
+from app.session import route_reads_to_replica
+from app.streaming import ndjson_response, stream_response
+from app.utils import parse_datetime
+
+export_bp = Blueprint('export_bp', __name__)
+export_bp.before_request(route_reads_to_replica)
+
+
+def _parse_filters():
+    """Return (export statement, None), or (None, error response) for bad filters."""
+    program_id = request.args.get('program_id')
+    try:
+        program_id = int(program_id) if program_id is not None else None
+    except ValueError:
+        return None, (jsonify({'error': 'program_id must be an integer'}), 400)
+    try:
+        created_from = parse_datetime(request.args.get('created_from'))
+        created_to = parse_datetime(request.args.get('created_to'))
+    except ValueError:
+        return None, (jsonify({'error': 'created_from/created_to must be ISO 8601 dates'}), 400)
+    # An unknown program would otherwise export nobody rather than fail
+    if program_id is not None and not loader.load(HealthProgram, program_id):
+        return None, (jsonify({'error': 'Program not found'}), 404)
+    return export_query(program_id, created_from, created_to), None
+
+
+# Route to export clients with their enrollments as CSV
+@export_bp.route('/exports/clients.csv', methods=['GET'])
+def export_clients_csv():
+    stmt, error = _parse_filters()
+    if error:
+        return error
+
+    return stream_response(csv_chunks(stmt), 'text/csv', filename='clients.csv')
+
+
+# Route to export clients with their enrollments as NDJSON, one client per line
+@export_bp.route('/exports/clients.ndjson', methods=['GET'])
+def export_clients_ndjson():
+    stmt, error = _parse_filters()
+    if error:
+        return error
+
+    return ndjson_response(group_clients(stream_rows(stmt)), filename='clients.ndjson')
@@ -0,0 +1,48 @@
+import time
+from flask import Blueprint, Response, current_app, jsonify
+from sqlalchemy import text
+from app.models import db
+
+health_bp = Blueprint('health_bp', __name__)
+
+
+def _pool_stats(engine):
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    # Only QueuePool-style pools expose sizing counters
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+# Route to report database reachability and connection pool usage
+@health_bp.route('/health/db', methods=['GET'])
+def db_health():
+    report = {}
+    healthy = True
+    for key, engine in db.engines.items():
+        stats = _pool_stats(engine)
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+            stats['status'] = 'ok'
+            stats['latency_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        except Exception as e:
+            healthy = False
+            stats['status'] = 'error'
+            stats['error'] = str(e)
+        report[key or 'primary'] = stats
+
+    return jsonify({'status': 'ok' if healthy else 'error', 'databases': report}), 200 if healthy else 503
+
+
+# Route to expose request metrics in Prometheus text format
+@health_bp.route('/metrics', methods=['GET'])
+def metrics():
+    registry = current_app.extensions.get('metrics')
+    if registry is None:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
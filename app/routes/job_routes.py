@@ -0,0 +1,117 @@
+import os
+import uuid
+from flask import Blueprint, request, jsonify, send_file, url_for
+from app import dedup, loader
+from app.jobs import QueueFull, jobs, job_payload
+from app.models import db, HealthProgram, Job
+from app.utils import parse_datetime
+
+job_bp = Blueprint('job_bp', __name__)
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+# Seconds a client should wait before retrying when the queue is full
+QUEUE_FULL_RETRY_AFTER = 30
+
+
+def _accepted(kind, **params):
+    """Queue a job and answer 202 with its status URL, or 503 when the queue is full."""
+    try:
+        job = jobs.submit(kind, **params)
+    except QueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(QUEUE_FULL_RETRY_AFTER)
+        return response, 503
+    status_url = url_for('job_bp.get_job', job_id=job.id)
+    return jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url}), 202, \
+        {'Location': status_url}
+
+
+# Route to import clients in the background (JSON array or NDJSON stream)
+@job_bp.route('/jobs/imports/clients', methods=['POST'])
+def submit_client_import():
+    ndjson = request.mimetype == 'application/x-ndjson'
+    if not ndjson and not isinstance(request.get_json(silent=True), list):
+        return jsonify({'error': 'Request body must be a JSON array of clients'}), 400
+
+    # Spool the upload so the request can finish before the job reads it
+    os.makedirs(jobs.job_dir, exist_ok=True)
+    path = os.path.join(jobs.job_dir, f'upload-{uuid.uuid4().hex}')
+    with open(path, 'wb') as spool:
+        if ndjson:
+            while chunk := request.stream.read(64 * 1024):
+                spool.write(chunk)
+        else:
+            spool.write(request.get_data())
+    response = _accepted('import_clients', path=path, ndjson=ndjson)
+    if response[1] != 202:
+        os.remove(path)
+    return response
+
+
+# Route to export clients to a downloadable file in the background
+@job_bp.route('/jobs/exports/clients', methods=['POST'])
+def submit_client_export():
+    data = request.get_json(silent=True) or {}
+    output = data.get('format', 'csv')
+    if output not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        parse_datetime(data.get('created_from'))
+        parse_datetime(data.get('created_to'))
+        program_id = int(data['program_id']) if data.get('program_id') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'program_id must be an integer and created_from/created_to ISO 8601 dates'}), 400
+    if program_id is not None and not loader.load(HealthProgram, program_id):
+        return jsonify({'error': 'Program not found'}), 404
+
+    return _accepted('export_clients', format=output, program_id=program_id,
+                     created_from=data.get('created_from'), created_to=data.get('created_to'))
+
+
+# Route to scan all clients for duplicates in the background
+@job_bp.route('/jobs/duplicates', methods=['POST'])
+def submit_duplicate_scan():
+    data = request.get_json(silent=True) or {}
+    by = data.get('by') or list(dedup.BLOCK_COLUMNS)
+    if not isinstance(by, list) or any(b not in dedup.BLOCK_COLUMNS for b in by):
+        return jsonify({'error': f"by must be a list of: {', '.join(dedup.BLOCK_COLUMNS)}"}), 400
+    threshold = data.get('threshold', dedup.DEFAULT_THRESHOLD)
+    if not isinstance(threshold, (int, float)) or not 0 < threshold <= 1:
+        return jsonify({'error': 'threshold must be between 0 and 1'}), 400
+
+    return _accepted('find_duplicates', by=by, threshold=threshold)
+
+
+# Route to recompute the statistics rollups in the background
+@job_bp.route('/jobs/stats/rebuild', methods=['POST'])
+def submit_stats_rebuild():
+    return _accepted('rebuild_stats')
+
+
+# Route to get a job's status, progress and result
+@job_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    payload = job_payload(job)
+    if job.status == 'succeeded' and payload['result'].get('output'):
+        payload['download_url'] = url_for('job_bp.download_job_output', job_id=job.id)
+    return jsonify(payload), 200
+
+
+# Route to download the file a finished export or duplicate scan produced
+@job_bp.route('/jobs/<job_id>/download', methods=['GET'])
+def download_job_output(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    result = job_payload(job)['result'] or {}
+    output = result.get('output')
+    path = os.path.join(jobs.job_dir, f'{job.id}.{output}')
+    if job.status != 'succeeded' or not output or not os.path.exists(path):
+        return jsonify({'error': 'No output available for this job'}), 404
+
+    return send_file(path, mimetype=EXPORT_FORMATS[output], as_attachment=True,
+                     download_name=f'{job.kind}.{output}')
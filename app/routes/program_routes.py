@@ -1,8 +1,17 @@
-from flask import Blueprint, request, jsonify
-from app.models import db, HealthProgram
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import tuple_
+from app.session import route_reads_to_replica
+from app.models import db, Client, HealthProgram, client_programs
+from app import deletes, loader, queries
+from app.bulk import enroll_clients
+from app.cache import cache, PROGRAM_LIST_KEY
+from app.conditional import conditional, program_clients_version, programs_version
+from app.serializers import program_serializer, roster_serializer
+from app.utils import parse_datetime, parse_id_list
 from datetime import datetime, timezone
 
 program_bp = Blueprint('program_bp', __name__)
+program_bp.before_request(route_reads_to_replica)
 
 # Route to get to add a health program
 @program_bp.route('/programs', methods=['POST'])
@@ -20,34 +29,32 @@ def create_program():
     program = HealthProgram(name=name, description=description)
     db.session.add(program)
     db.session.commit()
+    cache.invalidate(PROGRAM_LIST_KEY)
 
     return jsonify({'message': 'Program created', 'id': program.id}), 201
 
 
 # Route to get all health programs
 @program_bp.route('/programs', methods=['GET'])
+@conditional(programs_version)
 def list_programs():
-    programs = HealthProgram.query.all()
-    return jsonify([{
-        'id': p.id,
-        'name': p.name,
-        'description': p.description,
-        'created_at': p.created_at.isoformat()
-    } for p in programs]), 200
+    def build():
+        programs = db.session.execute(queries.program_list()).scalars()
+        return program_serializer.dump_many(programs), 200
+
+    return cache.json_response(PROGRAM_LIST_KEY, build)
 
 # Route to get a specific health program by ID
 @program_bp.route('/programs/<int:program_id>', methods=['GET'])
 def get_program(program_id):
-    program = HealthProgram.query.get(program_id)
-    if not program:
-        return jsonify({'error': 'Program not found'}), 404
+    def build():
+        program = loader.load(HealthProgram, program_id)
+        if not program:
+            return jsonify({'error': 'Program not found'}), 404
 
-    return jsonify({
-        'id': program.id,
-        'name': program.name,
-        'description': program.description,
-        'created_at': program.created_at.isoformat()
-    }), 200
+        return program_serializer.dump(program), 200
+
+    return cache.json_response(cache.program_key(program_id), build)
 
 # Route to update a health program
 @program_bp.route('/programs/<int:program_id>', methods=['PUT'])
@@ -66,27 +73,117 @@ def update_program(program_id):
         program.description = description
 
     db.session.commit()
+    cache.invalidate_program(program_id)
 
     return jsonify({'message': 'Program updated'}), 200
 
 # Route to delete a health program
 @program_bp.route('/programs/<int:program_id>', methods=['DELETE'])
 def delete_program(program_id):
-    program = HealthProgram.query.get(program_id)
-    if not program:
+    # Set-based: enrollments are deleted in one statement, enrolled clients are never loaded
+    if not deletes.delete_program(program_id):
         return jsonify({'error': 'Program not found'}), 404
-
-    db.session.delete(program)
     db.session.commit()
+    cache.invalidate_program(program_id)
 
     return jsonify({'message': 'Program deleted'}), 200
 
 # Route to get all clients enrolled in a specific program
 @program_bp.route('/programs/<int:program_id>/clients', methods=['GET'])
+@conditional(program_clients_version)
 def get_program_clients(program_id):
-    program = HealthProgram.query.get(program_id)
-    if not program:
+    if not loader.load(HealthProgram, program_id):
+        return jsonify({'error': 'Program not found'}), 404
+
+    # Select just the two columns instead of hydrating every enrolled Client
+    rows = db.session.execute(
+        db.select(Client.id, Client.first_name)
+        .join(client_programs, client_programs.c.client_id == Client.id)
+        .where(client_programs.c.program_id == program_id)
+    )
+    clients = [{'id': client_id, 'name': first_name} for client_id, first_name in rows]
+    return jsonify({'clients': clients}), 200
+
+
+ROSTER_PAGE_SIZE = 100
+ROSTER_MAX_PAGE_SIZE = 1000
+
+
+def _encode_roster_cursor(row):
+    return f'{row.enrollment_date.isoformat()}|{row.client_id}'
+
+
+def _decode_roster_cursor(cursor):
+    enrollment_date, client_id = cursor.rsplit('|', 1)
+    return datetime.fromisoformat(enrollment_date), int(client_id)
+
+
+# Route to page through a program's enrollees with enrollment metadata
+@program_bp.route('/programs/<int:program_id>/roster', methods=['GET'])
+def get_program_roster(program_id):
+    limit = request.args.get('limit', ROSTER_PAGE_SIZE, type=int)
+    order = request.args.get('sort', 'asc')
+    if limit < 1 or order not in ('asc', 'desc'):
+        return jsonify({'error': 'limit must be positive and sort "asc" or "desc"'}), 400
+    limit = min(limit, ROSTER_MAX_PAGE_SIZE)
+    try:
+        enrolled_from = parse_datetime(request.args.get('enrolled_from'))
+        enrolled_to = parse_datetime(request.args.get('enrolled_to'))
+        cursor = request.args.get('cursor')
+        after = _decode_roster_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'error': 'Invalid enrolled_from, enrolled_to or cursor'}), 400
+
+    if not loader.load(HealthProgram, program_id):
+        return jsonify({'error': 'Program not found'}), 404
+
+    cp = client_programs.c
+    key = tuple_(cp.enrollment_date, cp.client_id)
+    stmt = (db.select(cp.client_id, Client.first_name, Client.last_name, Client.gender,
+                      Client.date_of_birth, cp.enrollment_date, cp.notes)
+            .join(Client, Client.id == cp.client_id)
+            .where(cp.program_id == program_id))
+    if enrolled_from is not None:
+        stmt = stmt.where(cp.enrollment_date >= enrolled_from)
+    if enrolled_to is not None:
+        stmt = stmt.where(cp.enrollment_date < enrolled_to)
+    if order == 'asc':
+        if after:
+            stmt = stmt.where(key > tuple_(*after))
+        stmt = stmt.order_by(cp.enrollment_date, cp.client_id)
+    else:
+        if after:
+            stmt = stmt.where(key < tuple_(*after))
+        stmt = stmt.order_by(cp.enrollment_date.desc(), cp.client_id.desc())
+
+    rows = db.session.execute(stmt.limit(limit)).all()
+    return jsonify({
+        'program_id': program_id,
+        'clients': roster_serializer.dump_many(rows),
+        'next_cursor': _encode_roster_cursor(rows[-1]) if len(rows) == limit else None
+    }), 200
+
+# Route to enroll many clients in a program at once
+@program_bp.route('/programs/<int:program_id>/enroll', methods=['POST'])
+def enroll_program_clients(program_id):
+    data = request.get_json(silent=True) or {}
+    try:
+        client_ids = parse_id_list(data.get('client_ids'))
+    except ValueError as e:
+        return jsonify({'error': f'client_ids {e}'}), 400
+    try:
+        enrollment_date = parse_datetime(data.get('enrollment_date'))
+    except ValueError:
+        return jsonify({'error': 'Invalid enrollment_date. Use ISO 8601'}), 400
+
+    if not HealthProgram.query.get(program_id):
         return jsonify({'error': 'Program not found'}), 404
 
-    clients = [{'id': c.id, 'name': c.first_name} for c in program.clients]
-    return jsonify({'clients': clients}), 200
\ No newline at end of file
+    notes = data.get('notes')
+    result = enroll_clients(
+        ({'client_id': cid, 'program_id': program_id,
+          'enrollment_date': enrollment_date, 'notes': notes} for cid in client_ids),
+        chunk_size=current_app.config['BULK_CHUNK_SIZE']
+    )
+    del result['missing_program_ids']
+    return jsonify(result), 200
@@ -0,0 +1,51 @@
+from flask import Blueprint, request, jsonify
+from app import stats
+from app.session import route_reads_to_replica
+from app.utils import parse_date
+
+stats_bp = Blueprint('stats_bp', __name__)
+stats_bp.before_request(route_reads_to_replica)
+
+
+# Route to get the dashboard overview: per-program counts and demographics
+@stats_bp.route('/stats', methods=['GET'])
+def get_stats():
+    return jsonify({
+        'programs': stats.program_summary(),
+        'demographics': stats.demographics_summary()
+    }), 200
+
+
+# Route to get enrollment counts per program
+@stats_bp.route('/stats/programs', methods=['GET'])
+def get_program_stats():
+    return jsonify({'programs': stats.program_summary()}), 200
+
+
+# Route to get client gender and age breakdowns
+@stats_bp.route('/stats/demographics', methods=['GET'])
+def get_demographics():
+    return jsonify(stats.demographics_summary()), 200
+
+
+# Route to get new enrollments per day or week
+@stats_bp.route('/stats/enrollments', methods=['GET'])
+def get_enrollment_series():
+    interval = request.args.get('interval', 'day')
+    if interval not in ('day', 'week'):
+        return jsonify({'error': 'interval must be "day" or "week"'}), 400
+    try:
+        start = parse_date(request.args.get('from'))
+        end = parse_date(request.args.get('to'))
+    except ValueError:
+        return jsonify({'error': 'from/to must be YYYY-MM-DD'}), 400
+
+    series = stats.enrollment_series(interval, start, end, request.args.get('program_id', type=int))
+    return jsonify({'interval': interval, 'series': series}), 200
+
+
+# Route to recompute the rollup tables from scratch
+@stats_bp.route('/stats/rebuild', methods=['POST'])
+def rebuild_stats():
+    stats.rebuild()
+    return jsonify({'message': 'Statistics rebuilt'}), 200
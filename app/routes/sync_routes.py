@@ -0,0 +1,28 @@
+from flask import Blueprint, request, jsonify, current_app
+from app import changes
+
+# No replica routing here: a lagging replica could let the cursor skip rows
+sync_bp = Blueprint('sync_bp', __name__)
+
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 5000
+
+
+# Route to fetch rows changed since a previous sync token (omit it for a full sync)
+@sync_bp.route('/sync', methods=['GET'])
+def sync_changes():
+    try:
+        cursors = changes.decode_token(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    limit = request.args.get('limit', SYNC_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    limit = min(limit, SYNC_MAX_PAGE_SIZE)
+
+    result, next_cursors, has_more = changes.changes_since(
+        cursors, limit, current_app.config['SYNC_SETTLE_SECONDS']
+    )
+    # Keep calling with next_token while has_more is true; store it for the next sync
+    return jsonify({**result, 'next_token': changes.encode_token(next_cursors), 'has_more': has_more}), 200
@@ -0,0 +1,90 @@
+from sqlalchemy import DDL, event, func, text
+from app.models import db, Client, normalize_search_text
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# Search indexes: pg_trgm GIN index on Postgres, external-content FTS5 table on SQLite.
+# Emitted by create_all; migrated databases get them from 4f1c2a9d7e01, which
+# keeps its own frozen copy.
+SEARCH_DDL = {
+    'postgresql': [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'CREATE INDEX IF NOT EXISTS ix_clients_search_text_trgm '
+        'ON clients USING gin (search_text gin_trgm_ops)',
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts "
+        "USING fts5(search_text, content='clients', content_rowid='id')",
+        'CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN '
+        'INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END',
+        'CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN '
+        "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+        'CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE OF search_text ON clients BEGIN '
+        "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        'INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END',
+    ],
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Client.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
+
+def _tokens(query):
+    return normalize_search_text(query).split()
+
+
+def _escape_like(token):
+    return token.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts5_match(tokens):
+    # Every token must match as a prefix; quotes keep punctuation like '@' literal
+    return ' '.join('"{}"*'.format(t.replace('"', '""')) for t in tokens)
+
+
+def _search_sqlite(tokens, limit, offset):
+    rows = db.session.execute(
+        text('SELECT rowid FROM clients_fts WHERE clients_fts MATCH :match '
+             'ORDER BY rank LIMIT :limit OFFSET :offset'),
+        {'match': _fts5_match(tokens), 'limit': limit, 'offset': offset}
+    ).scalars().all()
+    if not rows:
+        return []
+    clients = {c.id: c for c in Client.query.filter(Client.id.in_(rows))}
+    return [clients[i] for i in rows if i in clients]
+
+
+def _search_postgresql(tokens, limit, offset):
+    # ILIKE on search_text is served by the pg_trgm GIN index; word_similarity
+    # ranks prefix-of-word matches above mid-word substring matches
+    query = ' '.join(tokens)
+    filters = [Client.search_text.ilike(f'%{_escape_like(t)}%', escape='\\') for t in tokens]
+    rank = func.word_similarity(query, Client.search_text)
+    return (Client.query.filter(*filters)
+            .order_by(rank.desc(), Client.id)
+            .limit(limit).offset(offset).all())
+
+
+def _search_generic(tokens, limit, offset):
+    filters = [Client.search_text.like(f'%{_escape_like(t)}%', escape='\\') for t in tokens]
+    return (Client.query.filter(*filters)
+            .order_by(Client.last_name, Client.first_name, Client.id)
+            .limit(limit).offset(offset).all())
+
+
+_BACKENDS = {
+    'sqlite': _search_sqlite,
+    'postgresql': _search_postgresql,
+}
+
+
+def search_clients(query, limit=SEARCH_DEFAULT_LIMIT, offset=0):
+    """Return clients matching every token of ``query`` as a prefix, best matches first."""
+    tokens = _tokens(query)
+    if not tokens:
+        return []
+    dialect = db.session.get_bind().dialect.name
+    backend = _BACKENDS.get(dialect, _search_generic)
+    return backend(tokens, limit, offset)
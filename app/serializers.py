@@ -0,0 +1,131 @@
+from functools import lru_cache
+from flask import request
+from sqlalchemy.orm import load_only, selectinload
+from app.models import Client, HealthProgram
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class Serializer:
+    """Turns model instances (or result rows) into dicts through generated code.
+
+    ``fields`` maps output names to ``'attr'`` (copied as-is), ``('attr', 'iso')``
+    (date/datetime to ISO 8601) or a nested Serializer for list relationships.
+    One function is compiled per distinct field selection and reused.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.compile = lru_cache(maxsize=64)(self._compile)
+
+    def _compile(self, names):
+        namespace = {'_iso': _iso}
+        items = []
+        for name in names:
+            spec = self.fields[name]
+            if isinstance(spec, Serializer):
+                fn_name = f'_nested_{name}'
+                namespace[fn_name] = spec.compile(tuple(spec.fields))
+                items.append(f'{name!r}: [{fn_name}(x) for x in obj.{name}]')
+            elif isinstance(spec, tuple):
+                items.append(f'{name!r}: _iso(obj.{spec[0]})')
+            else:
+                items.append(f'{name!r}: obj.{spec}')
+        source = 'def serialize(obj):\n    return {' + ', '.join(items) + '}\n'
+        exec(source, namespace)
+        return namespace['serialize']
+
+    def select(self, requested=None, default=None):
+        """Validate a field selection, falling back to ``default`` (or all fields)."""
+        if not requested:
+            return tuple(default or self.fields)
+        unknown = [f for f in requested if f not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return tuple(dict.fromkeys(requested))
+
+    def from_request(self, default=None):
+        """Read ``?fields=a,b`` from the current request. Raises ValueError for unknown names."""
+        raw = request.args.get('fields', '')
+        requested = [f.strip() for f in raw.split(',') if f.strip()]
+        return self.select(requested, default)
+
+    def load_options(self, names):
+        """Loader options so the query fetches only the columns the selection needs."""
+        columns = []
+        options = []
+        for name in names:
+            spec = self.fields[name]
+            if isinstance(spec, Serializer):
+                relationship = getattr(self.model, name)
+                nested_columns = [getattr(spec.model, _attr(s)) for s in spec.fields.values()]
+                options.append(selectinload(relationship).load_only(*nested_columns))
+            else:
+                columns.append(getattr(self.model, _attr(spec)))
+        if 'id' not in names:
+            columns.append(self.model.id)
+        return [load_only(*columns)] + options
+
+    def dump(self, obj, names=None):
+        return self.compile(names or tuple(self.fields))(obj)
+
+    def dump_many(self, objs, names=None):
+        serialize = self.compile(names or tuple(self.fields))
+        return [serialize(obj) for obj in objs]
+
+
+def _attr(spec):
+    return spec[0] if isinstance(spec, tuple) else spec
+
+
+program_ref_serializer = Serializer(HealthProgram, {
+    'id': 'id',
+    'name': 'name',
+})
+
+program_serializer = Serializer(HealthProgram, {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'created_at': ('created_at', 'iso'),
+    'updated_at': ('updated_at', 'iso'),
+})
+
+client_serializer = Serializer(Client, {
+    'id': 'id',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'email': 'email',
+    'date_of_birth': ('date_of_birth', 'iso'),
+    'gender': 'gender',
+    'phone_number': 'phone_number',
+    'address': 'address',
+    'created_at': ('created_at', 'iso'),
+    'updated_at': ('updated_at', 'iso'),
+    'programs': program_ref_serializer,
+})
+
+# Rows from the client_programs association table (or joins exposing these columns)
+enrollment_serializer = Serializer(None, {
+    'client_id': 'client_id',
+    'program_id': 'program_id',
+    'enrollment_date': ('enrollment_date', 'iso'),
+    'notes': 'notes',
+    'updated_at': ('updated_at', 'iso'),
+})
+
+# Program roster rows: client columns joined with client_programs
+roster_serializer = Serializer(None, {
+    'id': 'client_id',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'gender': 'gender',
+    'date_of_birth': ('date_of_birth', 'iso'),
+    'enrollment_date': ('enrollment_date', 'iso'),
+    'notes': 'notes',
+})
+
+CLIENT_SUMMARY_FIELDS = ('id', 'first_name', 'last_name', 'email')
@@ -0,0 +1,25 @@
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the ``replica`` bind while a request is marked read-only.
+
+    Flushes always go to the primary, and anything outside a read-only request
+    falls through to the normal bind_key resolution.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context()
+                and g.get('use_replica')):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def route_reads_to_replica():
+    """Blueprint before_request hook: GET requests read from the replica when one is configured."""
+    g.use_replica = request.method in ('GET', 'HEAD')
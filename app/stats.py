@@ -0,0 +1,117 @@
+from collections import Counter
+from datetime import date, timedelta
+from sqlalchemy import func, insert
+from app.models import db, Client, HealthProgram, ProgramStats, ClientDemographics, client_programs
+from app.utils import dialect_insert
+
+AGE_BUCKETS = ((0, 4), (5, 14), (15, 24), (25, 34), (35, 49), (50, 64), (65, None))
+
+def demographic_key(gender, date_of_birth):
+    return (gender or '', date_of_birth.year if date_of_birth else 0)
+
+
+def _increment(model, key_columns, count_column, deltas):
+    """Add ``deltas`` ({key tuple: n}) to ``count_column`` with one upsert statement."""
+    rows = [dict(zip(key_columns, key), **{count_column: n}) for key, n in deltas.items() if n]
+    if not rows:
+        return
+    upsert = dialect_insert(db.session)
+    column = getattr(model, count_column)
+    if upsert is not None:
+        stmt = upsert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={count_column: column + getattr(stmt.excluded, count_column)}
+        )
+        db.session.execute(stmt, rows)
+        return
+    for row in rows:
+        key = {k: row[k] for k in key_columns}
+        updated = db.session.execute(
+            db.update(model).filter_by(**key).values({count_column: column + row[count_column]})
+        ).rowcount
+        if not updated:
+            db.session.execute(insert(model).values(**row))
+
+
+def record_enrollments(program_deltas):
+    """Apply {program_id: +n/-n} enrollment changes inside the caller's transaction."""
+    _increment(ProgramStats, ('program_id',), 'enrollment_count',
+               {(pid,): n for pid, n in program_deltas.items()})
+
+
+def record_clients(demographic_deltas):
+    """Apply {(gender, birth_year): +n/-n} client changes inside the caller's transaction."""
+    _increment(ClientDemographics, ('gender', 'birth_year'), 'client_count', demographic_deltas)
+
+
+def rebuild():
+    """Recompute both rollup tables from the base tables."""
+    db.session.execute(db.delete(ProgramStats))
+    db.session.execute(db.delete(ClientDemographics))
+    db.session.execute(insert(ProgramStats).from_select(
+        ['program_id', 'enrollment_count'],
+        db.select(client_programs.c.program_id, func.count())
+        .group_by(client_programs.c.program_id)
+    ))
+    demographics = Counter()
+    rows = db.session.execute(
+        db.select(Client.gender, func.extract('year', Client.date_of_birth), func.count())
+        .group_by(Client.gender, func.extract('year', Client.date_of_birth))
+    )
+    for gender, year, count in rows:
+        demographics[(gender or '', int(year) if year else 0)] += count
+    record_clients(demographics)
+    db.session.commit()
+
+
+def program_summary():
+    rows = db.session.execute(
+        db.select(HealthProgram.id, HealthProgram.name,
+                  func.coalesce(ProgramStats.enrollment_count, 0))
+        .outerjoin(ProgramStats, ProgramStats.program_id == HealthProgram.id)
+        .order_by(HealthProgram.id)
+    )
+    return [{'program_id': pid, 'name': name, 'enrollments': count} for pid, name, count in rows]
+
+
+def _age_bucket(age):
+    for low, high in AGE_BUCKETS:
+        if high is None or age <= high:
+            return f'{low}+' if high is None else f'{low}-{high}'
+
+
+def demographics_summary(today=None):
+    today = today or date.today()
+    genders = Counter()
+    ages = Counter()
+    total = 0
+    for gender, birth_year, count in db.session.execute(
+            db.select(ClientDemographics.gender, ClientDemographics.birth_year,
+                      ClientDemographics.client_count)):
+        total += count
+        genders[gender or 'unknown'] += count
+        # Birth year granularity: ages are as of this calendar year
+        ages[_age_bucket(today.year - birth_year) if birth_year else 'unknown'] += count
+    return {'total_clients': total, 'by_gender': dict(genders), 'by_age': dict(ages)}
+
+
+def enrollment_series(interval='day', start=None, end=None, program_id=None):
+    """New enrollments per day or ISO week, served by the (program_id, enrollment_date) index."""
+    end = end or date.today() + timedelta(days=1)
+    start = start or end - timedelta(days=30)
+    day = func.date(client_programs.c.enrollment_date)
+    stmt = (db.select(day, func.count())
+            .where(client_programs.c.enrollment_date >= start,
+                   client_programs.c.enrollment_date < end)
+            .group_by(day).order_by(day))
+    if program_id is not None:
+        stmt = stmt.where(client_programs.c.program_id == program_id)
+
+    series = Counter()
+    for value, count in db.session.execute(stmt):
+        value = value if isinstance(value, date) else date.fromisoformat(value)
+        if interval == 'week':
+            value = value - timedelta(days=value.weekday())
+        series[value.isoformat()] += count
+    return [{'period': period, 'enrollments': count} for period, count in sorted(series.items())]
@@ -0,0 +1,69 @@
+import zlib
+from flask import Response, current_app, request, stream_with_context
+
+# Yielded pieces are coalesced to roughly this many bytes before sending
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def _dumps(obj):
+    # Use the app's JSON provider so streamed output matches jsonify
+    return current_app.json.dumps(obj)
+
+
+def _buffered(chunks, size=STREAM_BUFFER_SIZE):
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer).encode()
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_response(chunks, mimetype, status=200, filename=None):
+    """Stream text chunks, gzip-compressing on the fly when the client accepts it."""
+    body = _buffered(chunks)
+    response = Response(status=status, mimetype=mimetype)
+    if request.accept_encodings['gzip']:
+        body = _gzip(body)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.response = stream_with_context(body)
+    return response
+
+
+def ndjson_response(items, status=200, filename=None):
+    """Stream an iterable of dicts as newline-delimited JSON."""
+    return stream_response((_dumps(item) + '\n' for item in items),
+                           'application/x-ndjson', status, filename)
+
+
+def json_array_response(items, status=200):
+    """Stream an iterable of dicts as a single JSON array without building it in memory."""
+    def generate():
+        yield '['
+        first = True
+        for item in items:
+            if first:
+                first = False
+                yield _dumps(item)
+            else:
+                yield ',' + _dumps(item)
+        yield ']'
+
+    return stream_response(generate(), 'application/json', status)
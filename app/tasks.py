@@ -0,0 +1,70 @@
+"""Job types run by the background queue (app/jobs.py)."""
+import json
+import os
+from flask import current_app
+from app import dedup, stats
+from app.bulk import iter_ndjson, register_clients
+from app.exports import csv_chunks, export_query, group_clients, stream_rows
+from app.jobs import job_type
+from app.utils import parse_datetime
+
+# Failed rows kept in an import job's result
+MAX_REPORTED_ERRORS = 1000
+
+
+@job_type('import_clients')
+def import_clients(ctx, path, ndjson=False):
+    """Register clients from a spooled JSON array or NDJSON upload."""
+    try:
+        with open(path, 'rb') as upload:
+            records = iter_ndjson(upload) if ndjson else json.load(upload)
+            results = register_clients(records, chunk_size=current_app.config['BULK_CHUNK_SIZE'],
+                                       progress=ctx.progress)
+    finally:
+        os.remove(path)
+    failures = [r for r in results if r['status'] != 'created']
+    ctx.progress(len(results), len(results), force=True)
+    return {
+        'created': len(results) - len(failures),
+        'failed': len(failures),
+        'errors': failures[:MAX_REPORTED_ERRORS],
+    }
+
+
+@job_type('export_clients')
+def export_clients(ctx, format='csv', program_id=None, created_from=None, created_to=None):
+    """Write the /exports/clients.<format> payload to a file for later download."""
+    stmt = export_query(program_id, parse_datetime(created_from), parse_datetime(created_to))
+    rows = 0
+    with open(ctx.output_path('.' + format), 'w', newline='') as out:
+        if format == 'csv':
+            # Chunk 0 is the header line
+            for rows, line in enumerate(csv_chunks(stmt)):
+                out.write(line)
+                ctx.progress(rows)
+        else:
+            for client in group_clients(stream_rows(stmt)):
+                out.write(current_app.json.dumps(client) + '\n')
+                rows += 1
+                ctx.progress(rows)
+    ctx.progress(rows, rows, force=True)
+    return {'rows': rows, 'output': format}
+
+
+@job_type('find_duplicates')
+def find_duplicates(ctx, by=None, threshold=dedup.DEFAULT_THRESHOLD, workers=None):
+    """Full duplicate scan (process pool), written as NDJSON pairs."""
+    pairs = 0
+    with open(ctx.output_path('.ndjson'), 'w') as out:
+        for pair in dedup.scan(tuple(by or dedup.BLOCK_COLUMNS), threshold, workers):
+            out.write(current_app.json.dumps(pair) + '\n')
+            pairs += 1
+            ctx.progress(pairs)
+    ctx.progress(pairs, pairs, force=True)
+    return {'pairs': pairs, 'output': 'ndjson'}
+
+
+@job_type('rebuild_stats')
+def rebuild_stats(ctx):
+    stats.rebuild()
+    return {'message': 'Statistics rebuilt'}
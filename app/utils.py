@@ -0,0 +1,65 @@
+from datetime import datetime
+from importlib import import_module
+from itertools import islice
+
+# Dialects whose insert() supports ON CONFLICT clauses and RETURNING
+_ON_CONFLICT_DIALECTS = ('postgresql', 'sqlite')
+
+
+def dialect_insert(session):
+    """Return the ON CONFLICT-capable ``insert`` for the session's backend, or None."""
+    name = session.get_bind().dialect.name
+    if name not in _ON_CONFLICT_DIALECTS:
+        return None
+    # Imported on first use so boot doesn't load dialects the app never talks to
+    return import_module(f'sqlalchemy.dialects.{name}').insert
+
+
+def chunked(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string; empty values become None. Raises ValueError."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def extract_program_ids(items):
+    """Accept program ids or {'id': ...} objects, skipping values that are not ids."""
+    program_ids = []
+    for p in items:
+        if isinstance(p, dict) and 'id' in p:
+            program_ids.append(p['id'])
+        elif isinstance(p, (int, str)):
+            try:
+                program_ids.append(int(p))
+            except ValueError:
+                continue
+    return program_ids
+
+
+def parse_datetime(value):
+    """Parse an ISO 8601 date or datetime string; empty values become None. Raises ValueError."""
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise ValueError('expected an ISO 8601 string')
+    return datetime.fromisoformat(value)
+
+
+def parse_id_list(value):
+    """Return a list of ints from a JSON list, or raise ValueError."""
+    if not isinstance(value, list) or not value:
+        raise ValueError('must be a non-empty array of ids')
+    try:
+        return [int(v) for v in value]
+    except (TypeError, ValueError):
+        raise ValueError('must contain only integer ids')
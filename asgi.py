@@ -0,0 +1,4 @@
+from app.aio import create_asgi_app
+
+# Async deployment mode: uvicorn asgi:app
+app = create_asgi_app()
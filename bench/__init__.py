@@ -0,0 +1,4 @@
+"""Load-test and benchmark tooling.
+
+Run ``python -m bench --help`` from the repository root.
+"""
@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from bench import report, workload
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Seed data and replay a mixed API workload.')
+    parser.add_argument('--database', help='SQLAlchemy URI (default: fresh SQLite file in a temp dir)')
+    parser.add_argument('--url', help='Benchmark a running server instead of the in-process test client')
+    parser.add_argument('--clients', type=int, default=10000, help='synthetic clients to generate')
+    parser.add_argument('--programs', type=int, default=10, help='synthetic programs to generate')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse existing data in --database')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', metavar='PATH', help='write the JSON report (e.g. as a new baseline)')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against a stored report')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative p95/throughput regression (default 0.25)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    if args.url:
+        transport = workload.HttpTransport(args.url)
+        state = workload.WorkloadState.from_http(transport)
+    else:
+        from app import create_app
+        from bench.datagen import generate
+
+        uri = args.database or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+        app = create_app({'SQLALCHEMY_DATABASE_URI': uri, 'SLOW_REQUEST_MS': 0})
+        if not args.skip_seed:
+            start = time.perf_counter()
+            with app.app_context():
+                counts = generate(clients=args.clients, programs=args.programs, seed=args.seed)
+            print('Seeded %d clients, %d programs, %d enrollments in %.1fs'
+                  % (counts + (time.perf_counter() - start,)))
+        transport = workload.TestClientTransport(app)
+        state = workload.WorkloadState.from_database(app)
+
+    samples, wall = workload.run(transport, state, requests=args.requests,
+                                 concurrency=args.concurrency, seed=args.seed)
+    result = report.summarize(samples, wall)
+    print(report.format_table(result))
+
+    if args.save:
+        report.save(result, args.save)
+    if args.baseline:
+        regressions = report.compare(result, report.load(args.baseline), args.tolerance)
+        if regressions:
+            print('\nRegressions against %s:' % args.baseline)
+            for line in regressions:
+                print('  ' + line)
+            return 1
+        print('\nNo regressions against %s' % args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Compare the sync WSGI deployment with the ASGI/async-driver mode.
+
+Seeds a SQLite database, starts one worker of each server in turn
+(gunicorn sync worker vs uvicorn + app.aio), drives the same read-heavy mix
+with an asyncio HTTP client and reports requests/sec, latency and worker RSS.
+
+Usage: python -m bench.async_mode [--clients 20000] [--concurrency 32] [--duration 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from bench.report import percentile
+
+SERVERS = {
+    'sync (gunicorn)': [sys.executable, '-m', 'gunicorn', '-w', '1', '-b', '127.0.0.1:{port}', 'run:app'],
+    'async (uvicorn)': [sys.executable, '-m', 'uvicorn', '--workers', '1', '--port', '{port}',
+                        '--log-level', 'warning', 'asgi:app'],
+}
+
+
+def _paths(rng, max_client):
+    choice = rng.random()
+    if choice < 0.2:
+        return '/programs'
+    if choice < 0.6:
+        return f'/clients/{rng.randint(1, max_client)}?fields=id,first_name,last_name,programs'
+    if choice < 0.8:
+        return f'/clients/{rng.randint(1, max_client)}/programs'
+    return f'/clients?after_id={rng.randint(1, max_client)}&limit=20'
+
+
+async def _get(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def _drive(port, concurrency, duration, max_client, seed):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(n):
+        nonlocal errors
+        rng = random.Random(seed + n)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await _get(port, _paths(rng, max_client))
+            except OSError:
+                status = 599
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def _rss_mb(pid):
+    # Sum the server and its worker processes (gunicorn/uvicorn fork workers)
+    total = 0
+    for p in [pid] + _children(pid):
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total / 1024
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(c) for c in f.read().split()]
+    except OSError:
+        return []
+
+
+def _wait_ready(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/programs', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.async_mode')
+    parser.add_argument('--clients', type=int, default=20000)
+    parser.add_argument('--programs', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from bench.datagen import generate
+
+    uri = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': uri})
+    with app.app_context():
+        generate(clients=args.clients, programs=args.programs, seed=args.seed)
+
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=uri, SLOW_REQUEST_MS='0')
+    print(f'{"mode":<18}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"errors":>8}{"RSS MB":>9}')
+    for name, command in SERVERS.items():
+        command = [part.format(port=args.port) for part in command]
+        server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(args.port)
+            latencies, errors, wall = asyncio.run(
+                _drive(args.port, args.concurrency, args.duration, args.clients, args.seed))
+            rss = _rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+        latencies.sort()
+        print(f'{name:<18}{len(latencies) / wall:>10.1f}{percentile(latencies, 50) * 1000:>10.1f}'
+              f'{percentile(latencies, 95) * 1000:>10.1f}{percentile(latencies, 99) * 1000:>10.1f}'
+              f'{errors:>8}{rss:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import random
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, insert
+from app import stats
+from app.models import db, Client, HealthProgram, client_programs, normalize_search_text
+from app.normalize import blocking_keys
+from app.utils import chunked
+
+FIRST_NAMES = ['Amina', 'Brian', 'Catherine', 'David', 'Esther', 'Felix', 'Grace', 'Hassan',
+               'Irene', 'James', 'Joyce', 'Kevin', 'Lucy', 'Mercy', 'Njeri', 'Otieno',
+               'Peter', 'Rose', 'Samuel', 'Wanjiku', 'Yusuf', 'Zawadi']
+LAST_NAMES = ['Achieng', 'Barasa', 'Chebet', 'Kamau', 'Kariuki', 'Kiprop', 'Mohamed',
+              'Muthoni', 'Mwangi', 'Njoroge', 'Ochieng', 'Odhiambo', 'Omondi', 'Onyango',
+              'Wafula', 'Wambui', 'Wanjiru', 'Were']
+PROGRAM_NAMES = ['TB', 'Malaria', 'HIV', 'Maternal Health', 'Immunization', 'Diabetes',
+                 'Hypertension', 'Nutrition', 'Family Planning', 'Mental Health']
+GENDERS = ['Female', 'Male', 'Other']
+# Share of clients enrolled in 0, 1, 2, 3 and 4 programs
+ENROLLMENT_COUNT_WEIGHTS = [0.25, 0.45, 0.2, 0.07, 0.03]
+
+
+def _phone(rng):
+    digits = f'7{rng.randrange(10 ** 8):08d}'
+    # Mix the formats seen in field data
+    return rng.choice([f'+254{digits}', f'0{digits}', f'254 {digits[:3]} {digits[3:6]} {digits[6:]}'])
+
+
+def generate(clients=10000, programs=10, seed=42, chunk_size=5000, start=None):
+    """Bulk-insert synthetic programs, clients and enrollments. Must run in an app context.
+
+    Program popularity follows a Zipf-like curve, so a few programs hold most
+    enrollments, the way TB/HIV/Malaria do in production.
+    Returns the number of (clients, programs, enrollments) inserted.
+    """
+    rng = random.Random(seed)
+    start = start or datetime.now() - timedelta(days=365)
+
+    offset = db.session.execute(db.select(func.count(HealthProgram.id))).scalar()
+    program_rows = []
+    for i in range(programs):
+        base = PROGRAM_NAMES[i % len(PROGRAM_NAMES)]
+        suffix = (offset + i) // len(PROGRAM_NAMES)
+        program_rows.append({
+            'name': f'{base} {suffix}' if suffix else base,
+            'description': f'{base} programme',
+            'created_at': start,
+        })
+    program_ids = db.session.execute(
+        insert(HealthProgram).returning(HealthProgram.id, sort_by_parameter_order=True), program_rows
+    ).scalars().all()
+    db.session.commit()
+    weights = [1.0 / (rank + 1) for rank in range(len(program_ids))]
+
+    email_offset = db.session.execute(db.select(func.max(Client.id))).scalar() or 0
+    client_total = 0
+    enrollment_total = 0
+    for chunk in chunked(range(clients), chunk_size):
+        rows = []
+        for n in chunk:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f'{first}.{last}.{email_offset + n}@example.org'.lower() if rng.random() < 0.6 else None
+            dob = date(1940, 1, 1) + timedelta(days=rng.randrange(365 * 80))
+            gender = rng.choice(GENDERS)
+            phone = _phone(rng) if rng.random() < 0.8 else None
+            rows.append({
+                'first_name': first,
+                'last_name': last,
+                'date_of_birth': dob,
+                'gender': gender,
+                'phone_number': phone,
+                'email': email,
+                'address': f'P.O. Box {rng.randrange(100, 99999)}',
+                'created_at': start + timedelta(seconds=rng.randrange(365 * 86400)),
+                'search_text': normalize_search_text(first, last, email),
+                **blocking_keys(last, dob, phone),
+            })
+        ids = db.session.execute(
+            insert(Client).returning(Client.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+        enrollments = []
+        for client_id, row in zip(ids, rows):
+            count = rng.choices(range(len(ENROLLMENT_COUNT_WEIGHTS)), ENROLLMENT_COUNT_WEIGHTS)[0]
+            chosen = set()
+            while program_ids and len(chosen) < min(count, len(program_ids)):
+                chosen.add(rng.choices(program_ids, weights)[0])
+            for program_id in chosen:
+                enrollments.append({
+                    'client_id': client_id,
+                    'program_id': program_id,
+                    'enrollment_date': row['created_at'] + timedelta(days=rng.randrange(30)),
+                    'notes': None,
+                })
+        if enrollments:
+            db.session.execute(insert(client_programs), enrollments)
+        db.session.commit()
+        client_total += len(ids)
+        enrollment_total += len(enrollments)
+
+    # Bulk inserts bypass the incremental rollups
+    stats.rebuild()
+    return client_total, len(program_ids), enrollment_total
@@ -0,0 +1,113 @@
+"""Registration latency with and without the client email/created_at indexes.
+
+Seeds --rows synthetic clients, then times the same operations twice:
+- legacy: the indexes are dropped, and registration pre-queries
+  ``Client.query.filter_by(email=...)`` before inserting;
+- indexed: the indexes exist, and registration simply inserts and lets the
+  unique index reject duplicates.
+
+Each registration includes its commit. Also timed are rejected duplicates and
+a one-month created_at range count.
+
+Usage: python -m bench.email_index [--rows 1000000] [--samples 200] [--database URI]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+INDEX_DDL = {
+    'uq_clients_email_lower': 'CREATE UNIQUE INDEX uq_clients_email_lower ON clients (lower(email))',
+    'ix_clients_created_at': 'CREATE INDEX ix_clients_created_at ON clients (created_at)',
+}
+
+
+def _timed(fn, samples):
+    timings = []
+    for i in range(samples):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.95) - 1]
+
+
+def _run(label, samples, existing_emails):
+    from sqlalchemy.exc import IntegrityError
+    from app.models import db, Client
+
+    def legacy_register(i, email=None):
+        email = email or f'legacy.{label}.{i}@bench.example'
+        if Client.query.filter_by(email=email).first():
+            return False
+        db.session.add(Client(first_name='Bench', last_name='Client', email=email))
+        db.session.commit()
+        return True
+
+    def indexed_register(i, email=None):
+        db.session.add(Client(first_name='Bench', last_name='Client',
+                              email=email or f'indexed.{label}.{i}@bench.example'))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
+
+    register = legacy_register if label == 'legacy' else indexed_register
+    window_start = datetime.now() - timedelta(days=180)
+    return {
+        'register': _timed(register, samples),
+        'duplicate': _timed(lambda i: register(i, existing_emails[i % len(existing_emails)]), samples),
+        'created_at range': _timed(lambda i: db.session.execute(
+            db.select(db.func.count()).select_from(Client)
+            .where(Client.created_at >= window_start, Client.created_at < window_start + timedelta(days=30))
+        ).scalar(), samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.email_index', description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLAlchemy URI (default: fresh SQLite file in a temp dir)')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='synthetic clients to seed')
+    parser.add_argument('--samples', type=int, default=200, help='timed operations per measurement')
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from app.models import db, Client
+    from bench.datagen import generate
+
+    uri = args.database or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'email_index.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': uri, 'METRICS_ENABLED': False})
+    results = {}
+    with app.app_context():
+        start = time.perf_counter()
+        generate(clients=args.rows, programs=10, seed=11)
+        print('Seeded %d clients in %.1fs' % (args.rows, time.perf_counter() - start))
+        # Spread across the table so a sequential scan can't stop early
+        existing = db.session.execute(
+            db.select(Client.email).where(Client.email.is_not(None))
+            .order_by(db.func.random()).limit(args.samples)
+        ).scalars().all()
+
+        for name in INDEX_DDL:
+            db.session.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+        db.session.commit()
+        results['legacy'] = _run('legacy', args.samples, existing)
+
+        for ddl in INDEX_DDL.values():
+            db.session.execute(db.text(ddl))
+        db.session.commit()
+        results['indexed'] = _run('indexed', args.samples, existing)
+
+    print('\n%-18s %22s %22s' % ('operation', 'legacy p50/p95 ms', 'indexed p50/p95 ms'))
+    for operation in results['legacy']:
+        legacy, indexed = results['legacy'][operation], results['indexed'][operation]
+        print('%-18s %13.2f / %6.2f %13.2f / %6.2f' % (operation, *legacy, *indexed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
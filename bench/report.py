@@ -0,0 +1,79 @@
+import json
+import math
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _stats(latencies, errors, wall_seconds):
+    latencies = sorted(latencies)
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def summarize(samples, wall_seconds):
+    """Aggregate (name, seconds, status) samples into per-endpoint and total stats.
+
+    Per-endpoint throughput is that endpoint's share of the run's wall time.
+    """
+    by_name = {}
+    for name, seconds, status in samples:
+        entry = by_name.setdefault(name, ([], [0]))
+        entry[0].append(seconds)
+        if status >= 500:
+            entry[1][0] += 1
+
+    endpoints = {name: _stats(latencies, errors[0], wall_seconds)
+                 for name, (latencies, errors) in sorted(by_name.items())}
+    total = _stats([s for _, s, _ in samples],
+                   sum(e['errors'] for e in endpoints.values()), wall_seconds)
+    return {'wall_seconds': round(wall_seconds, 3), 'total': total, 'endpoints': endpoints}
+
+
+def compare(current, baseline, tolerance=0.25):
+    """Return regressions where p95 grew or throughput dropped by more than ``tolerance``."""
+    regressions = []
+    for name, stats in current['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if not base:
+            continue
+        if base['p95_ms'] and stats['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']} ms -> {stats['p95_ms']} ms")
+        if stats['errors'] > base['errors']:
+            regressions.append(f"{name}: errors {base['errors']} -> {stats['errors']}")
+    base_rps = baseline['total']['throughput_rps']
+    if base_rps and current['total']['throughput_rps'] < base_rps * (1 - tolerance):
+        regressions.append(f"total: throughput {base_rps} -> {current['total']['throughput_rps']} req/s")
+    return regressions
+
+
+def format_table(report):
+    header = f"{'endpoint':<28}{'count':>7}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines = [header, '-' * len(header)]
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+    for name, s in rows:
+        lines.append(f"{name:<28}{s['count']:>7}{s['errors']:>5}{s['throughput_rps']:>10}"
+                     f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+    return '\n'.join(lines)
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,80 @@
+"""Compare the hand-built client dicts + stdlib JSON with the compiled serializers.
+
+Usage: python -m bench.serialization [--rows 100000]
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app import json_provider
+from app.json_provider import FastJSONProvider
+from app.serializers import client_serializer
+
+
+def _rows(n):
+    programs = [SimpleNamespace(id=i, name=f'Program {i}') for i in range(1, 4)]
+    start = datetime(2024, 1, 1)
+    return [SimpleNamespace(
+        id=i, first_name='Amina', last_name='Kamau', email=f'amina{i}@example.org',
+        date_of_birth=date(1980, 1, 1) + timedelta(days=i % 15000), gender='Female',
+        phone_number='+254700000000', address='P.O. Box 1', created_at=start + timedelta(minutes=i),
+        programs=programs[:i % 4],
+    ) for i in range(n)]
+
+
+def _legacy(rows, provider):
+    # Mirrors the per-route dict building that list_clients used to do
+    data = [{
+        'id': c.id,
+        'first_name': c.first_name,
+        'last_name': c.last_name,
+        'email': c.email,
+        'date_of_birth': c.date_of_birth,
+        'gender': c.gender,
+        'phone_number': c.phone_number,
+        'address': c.address,
+        'created_at': c.created_at,
+        'programs': [{'id': p.id, 'name': p.name} for p in c.programs]
+    } for c in rows]
+    return provider.dumps(data)
+
+
+def _compiled(rows, provider):
+    return provider.dumps(client_serializer.dump_many(rows))
+
+
+def _time(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, len(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.serialization')
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    rows = _rows(args.rows)
+    results = [('legacy dicts + stdlib', _time(_legacy, rows, DefaultJSONProvider(app)))]
+
+    orjson = json_provider.orjson
+    json_provider.orjson = None
+    results.append(('compiled + stdlib', _time(_compiled, rows, FastJSONProvider(app))))
+    json_provider.orjson = orjson
+    if orjson is not None:
+        results.append(('compiled + orjson', _time(_compiled, rows, FastJSONProvider(app))))
+
+    baseline = results[0][1][0]
+    print(f'{args.rows} client rows (best of 3)')
+    for name, (seconds, size) in results:
+        print(f'{name:<24}{seconds * 1000:>10.1f} ms{size / 1e6:>9.1f} MB{baseline / seconds:>8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Measure app startup: cold start to first request, and gunicorn worker boot.
+
+In-process mode runs a fresh interpreter per sample and times:
+- import of the app package;
+- create_app();
+- the first request through the test client.
+Each sample runs with DB_CREATE_ALL on and off.
+
+With --gunicorn it also starts gunicorn with and without --preload and times
+each worker's boot: fork to app ready, measured by server hooks. It also times
+launch to the first successful response.
+
+Usage: python -m bench.startup [--runs 5] [--gunicorn] [--workers 4]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+_PROBE = '''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+status = app.test_client().get('/programs').status_code
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first_request': t3 - t2,
+                  'total': t3 - t0, 'status': status}))
+'''
+
+_GUNICORN_HOOKS = '''
+import sys, time
+
+def pre_fork(server, worker):
+    worker.fork_started = time.monotonic()
+
+def post_worker_init(worker):
+    print('worker_boot_ms=%.1f' % ((time.monotonic() - worker.fork_started) * 1000), file=sys.stderr, flush=True)
+'''
+
+
+def _env(uri, create_all):
+    return dict(os.environ, SQLALCHEMY_DATABASE_URI=uri, DB_CREATE_ALL=str(create_all).lower())
+
+
+def in_process(uri, runs):
+    results = {}
+    for create_all in (True, False):
+        samples = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, '-c', _PROBE], env=_env(uri, create_all),
+                                 capture_output=True, text=True, check=True)
+            samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        results[f'create_all={create_all}'] = {
+            key: statistics.median(s[key] for s in samples) * 1000
+            for key in ('import', 'create_app', 'first_request', 'total')
+        }
+    return results
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def gunicorn(uri, workers, preload, create_all=False):
+    port = _free_port()
+    hooks = os.path.join(tempfile.mkdtemp(), 'hooks.py')
+    with open(hooks, 'w') as f:
+        f.write(_GUNICORN_HOOKS)
+    cmd = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', '-c', hooks]
+    if preload:
+        cmd.append('--preload')
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd + ['run:app'], env=_env(uri, create_all),
+                            stderr=subprocess.PIPE, text=True)
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/programs', timeout=1).read()
+                break
+            except OSError:
+                if proc.poll() is not None or time.perf_counter() - started > 60:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.005)
+        first_response = (time.perf_counter() - started) * 1000
+        time.sleep(1)  # let the remaining workers report
+    finally:
+        proc.terminate()
+        _, stderr = proc.communicate(timeout=30)
+    boots = [float(line.split('=', 1)[1]) for line in stderr.splitlines() if line.startswith('worker_boot_ms=')]
+    return {'first_response_ms': first_response,
+            'worker_boot_ms_median': statistics.median(boots) if boots else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.startup', description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='SQLAlchemy URI (default: fresh SQLite file in a temp dir)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--gunicorn', action='store_true', help='also measure gunicorn worker boot')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    uri = args.database or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+    # Create the schema once so the create_all=False runs have tables to query
+    subprocess.run([sys.executable, '-c', 'from app import create_app; create_app()'],
+                   env=_env(uri, True), check=True)
+
+    print('%-20s %10s %12s %15s %10s' % ('mode', 'import', 'create_app', 'first request', 'total'))
+    for mode, r in in_process(uri, args.runs).items():
+        print('%-20s %8.1fms %10.1fms %13.1fms %8.1fms' % (mode, r['import'], r['create_app'],
+                                                          r['first_request'], r['total']))
+    if args.gunicorn:
+        print()
+        for preload in (False, True):
+            r = gunicorn(uri, args.workers, preload)
+            print('gunicorn %-12s first response %7.1fms, worker boot (median) %7.1fms'
+                  % ('--preload' if preload else '', r['first_response_ms'], r['worker_boot_ms_median']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func
+from app.models import db, Client, HealthProgram
+
+
+class TestClientTransport:
+    """Drive the app in-process through Flask's test client."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        data = response.get_data()  # drain streamed bodies so they are timed too
+        return response.status_code, data
+
+
+class HttpTransport:
+    """Drive a running server (e.g. a local gunicorn) over HTTP."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+class WorkloadState:
+    """Ids the workload draws from; created rows are tracked so deletes stay self-contained."""
+
+    def __init__(self, client_ids, program_ids):
+        self.min_client, self.max_client = client_ids
+        self.program_ids = program_ids
+        self.created_clients = []
+        self.created_programs = []
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_database(cls, app):
+        with app.app_context():
+            low, high = db.session.execute(db.select(func.min(Client.id), func.max(Client.id))).one()
+            program_ids = db.session.execute(db.select(HealthProgram.id)).scalars().all()
+        return cls((low or 1, high or 1), program_ids or [1])
+
+    @classmethod
+    def from_http(cls, transport):
+        _, body = transport.request('GET', '/programs')
+        program_ids = [p['id'] for p in json.loads(body)] or [1]
+        _, body = transport.request('GET', '/clients?limit=1')
+        first = json.loads(body).get('clients') or [{'id': 1}]
+        # Without DB access assume a dense id range starting at the first client
+        return cls((first[0]['id'], first[0]['id'] + 10000), program_ids)
+
+    def client_id(self, rng):
+        return rng.randint(self.min_client, self.max_client)
+
+    def program_id(self, rng):
+        return rng.choice(self.program_ids)
+
+    def pop(self, items):
+        with self.lock:
+            return items.pop() if items else None
+
+
+def _new_client(rng):
+    n = rng.randrange(10 ** 9)
+    return {'first_name': f'Bench{n}', 'last_name': 'Load', 'email': f'bench{n}@example.org',
+            'date_of_birth': '1990-05-17', 'gender': 'Female'}
+
+
+# Each operation returns (method, path, body); weights approximate clinic traffic
+def op_list_clients(s, rng):
+    return 'GET', f'/clients?after_id={s.client_id(rng)}&limit=50', None
+
+
+def op_get_client(s, rng):
+    return 'GET', f'/clients/{s.client_id(rng)}', None
+
+
+def op_get_client_programs(s, rng):
+    return 'GET', f'/clients/{s.client_id(rng)}/programs', None
+
+
+def op_search_clients(s, rng):
+    return 'GET', '/clients/search?q=' + rng.choice(['ama', 'kamau', 'grace wan', 'otieno', 'jo']), None
+
+
+def op_register_client(s, rng):
+    return 'POST', '/clients', dict(_new_client(rng), programs=[s.program_id(rng)])
+
+
+def op_register_bulk(s, rng):
+    return 'POST', '/clients/bulk', [_new_client(rng) for _ in range(50)]
+
+
+def op_update_client(s, rng):
+    return 'PUT', f'/clients/{s.client_id(rng)}', {'address': f'P.O. Box {rng.randrange(99999)}'}
+
+
+def op_delete_client(s, rng):
+    client_id = s.pop(s.created_clients)
+    if client_id is None:
+        return op_get_client(s, rng)
+    return 'DELETE', f'/clients/{client_id}', None
+
+
+def op_enroll_client(s, rng):
+    return 'POST', f'/clients/{s.client_id(rng)}/enroll', {'program_ids': [s.program_id(rng)]}
+
+
+def op_enroll_client_in_program(s, rng):
+    return 'POST', f'/clients/{s.client_id(rng)}/programs/{s.program_id(rng)}', None
+
+
+def op_remove_client_program(s, rng):
+    return 'DELETE', f'/clients/{s.client_id(rng)}/programs/{s.program_id(rng)}', None
+
+
+def op_list_programs(s, rng):
+    return 'GET', '/programs', None
+
+
+def op_get_program(s, rng):
+    return 'GET', f'/programs/{s.program_id(rng)}', None
+
+
+def op_create_program(s, rng):
+    return 'POST', '/programs', {'name': f'Bench program {rng.randrange(10 ** 9)}'}
+
+
+def op_update_program(s, rng):
+    return 'PUT', f'/programs/{s.program_id(rng)}', {'description': f'rev {rng.randrange(1000)}'}
+
+
+def op_delete_program(s, rng):
+    program_id = s.pop(s.created_programs)
+    if program_id is None:
+        return op_get_program(s, rng)
+    return 'DELETE', f'/programs/{program_id}', None
+
+
+def op_program_clients(s, rng):
+    return 'GET', f'/programs/{s.program_id(rng)}/clients', None
+
+
+def op_enroll_program(s, rng):
+    return 'POST', f'/programs/{s.program_id(rng)}/enroll', {
+        'client_ids': [s.client_id(rng) for _ in range(100)]}
+
+
+OPERATIONS = [
+    (op_list_clients, 10),
+    (op_get_client, 20),
+    (op_get_client_programs, 10),
+    (op_search_clients, 15),
+    (op_register_client, 5),
+    (op_register_bulk, 1),
+    (op_update_client, 4),
+    (op_delete_client, 1),
+    (op_enroll_client, 3),
+    (op_enroll_client_in_program, 3),
+    (op_remove_client_program, 2),
+    (op_list_programs, 10),
+    (op_get_program, 6),
+    (op_create_program, 1),
+    (op_update_program, 1),
+    (op_delete_program, 1),
+    (op_program_clients, 3),
+    (op_enroll_program, 1),
+]
+
+
+def _track_created(state, name, status, body):
+    if status != 201:
+        return
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return
+    with state.lock:
+        if name == 'register_client':
+            state.created_clients.append(payload['client']['id'])
+        elif name == 'create_program':
+            state.created_programs.append(payload['id'])
+
+
+def run(transport, state, requests=1000, concurrency=1, seed=42):
+    """Replay ``requests`` weighted operations. Returns (samples, wall_seconds).
+
+    Each sample is (operation name, seconds, status code).
+    """
+    functions, weights = zip(*OPERATIONS)
+    plan_rng = random.Random(seed)
+    plan = plan_rng.choices(functions, weights, k=requests)
+    samples = []
+
+    def execute(i, fn):
+        rng = random.Random(seed * 1000003 + i)
+        method, path, body = fn(state, rng)
+        name = fn.__name__[3:]
+        start = time.perf_counter()
+        status, data = transport.request(method, path, body)
+        elapsed = time.perf_counter() - start
+        _track_created(state, name, status, data)
+        return name, elapsed, status
+
+    wall_start = time.perf_counter()
+    if concurrency <= 1:
+        samples = [execute(i, fn) for i, fn in enumerate(plan)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(execute, range(len(plan)), plan))
+    return samples, time.perf_counter() - wall_start
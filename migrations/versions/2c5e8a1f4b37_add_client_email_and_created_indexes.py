@@ -0,0 +1,45 @@
+"""add client email and created_at indexes
+
+Revision ID: 2c5e8a1f4b37
+Revises: 0a8e2c4d6f13
+Create Date: 2026-10-17 21:03:27.418590
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c5e8a1f4b37'
+down_revision = '0a8e2c4d6f13'
+branch_labels = None
+depends_on = None
+
+# Case-insensitive duplicates reported when the unique index can't be built
+MAX_REPORTED_DUPLICATES = 20
+
+
+def upgrade():
+    conn = op.get_bind()
+    # Blank emails were stored as '' before registration normalized them to NULL
+    op.execute("UPDATE clients SET email = NULL WHERE trim(email) = ''")
+
+    duplicates = conn.execute(sa.text(
+        'SELECT lower(email), count(*) FROM clients WHERE email IS NOT NULL '
+        'GROUP BY lower(email) HAVING count(*) > 1 ORDER BY count(*) DESC LIMIT :limit'
+    ), {'limit': MAX_REPORTED_DUPLICATES}).all()
+    if duplicates:
+        listed = ', '.join(f'{email} ({count})' for email, count in duplicates)
+        raise RuntimeError(
+            'Cannot add the unique email index: these emails belong to more than one client '
+            f'(showing up to {MAX_REPORTED_DUPLICATES}): {listed}. '
+            'Merge or correct those clients and run the upgrade again.'
+        )
+
+    op.create_index('uq_clients_email_lower', 'clients', [sa.text('lower(email)')], unique=True)
+    op.create_index('ix_clients_created_at', 'clients', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_clients_created_at', table_name='clients')
+    op.drop_index('uq_clients_email_lower', table_name='clients')
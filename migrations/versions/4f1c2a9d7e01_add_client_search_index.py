@@ -0,0 +1,64 @@
+"""add client search index
+
+Revision ID: 4f1c2a9d7e01
+Revises: bcdfcaa22188
+Create Date: 2026-10-17 09:12:44.201553
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4f1c2a9d7e01'
+down_revision = 'bcdfcaa22188'
+branch_labels = None
+depends_on = None
+
+SEARCH_DDL = {
+    'postgresql': [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'CREATE INDEX IF NOT EXISTS ix_clients_search_text_trgm '
+        'ON clients USING gin (search_text gin_trgm_ops)',
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts "
+        "USING fts5(search_text, content='clients', content_rowid='id')",
+        'CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN '
+        'INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END',
+        'CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN '
+        "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+        'CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE OF search_text ON clients BEGIN '
+        "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        'INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END',
+    ],
+}
+
+
+def upgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    # Backfill; accent folding for existing rows happens on their next update
+    op.execute(
+        "UPDATE clients SET search_text = lower(trim("
+        "first_name || ' ' || last_name || ' ' || coalesce(email, '')))"
+    )
+
+    dialect = op.get_bind().dialect.name
+    for statement in SEARCH_DDL.get(dialect, []):
+        op.execute(statement)
+    if dialect == 'sqlite':
+        op.execute("INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_clients_search_text_trgm')
+    elif dialect == 'sqlite':
+        for trigger in ('clients_fts_ai', 'clients_fts_ad', 'clients_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS clients_fts')
+
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
@@ -0,0 +1,43 @@
+"""cascade client_programs deletes
+
+Revision ID: 5d9f2b7c1e48
+Revises: 2c5e8a1f4b37
+Create Date: 2026-10-17 22:41:09.153872
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9f2b7c1e48'
+down_revision = '2c5e8a1f4b37'
+branch_labels = None
+depends_on = None
+
+# Names unnamed SQLite foreign keys so batch mode can drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _replace_foreign_keys(ondelete):
+    # The table predates the migrations, so constraint names are whatever the
+    # database generated; reflect them instead of guessing
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys('client_programs')
+    with op.batch_alter_table('client_programs', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        for fk in foreign_keys:
+            name = fk['name'] or NAMING_CONVENTION['fk'] % {
+                'table_name': 'client_programs',
+                'column_0_name': fk['constrained_columns'][0],
+                'referred_table_name': fk['referred_table'],
+            }
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, fk['referred_table'], fk['constrained_columns'],
+                                        fk['referred_columns'], ondelete=ondelete)
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
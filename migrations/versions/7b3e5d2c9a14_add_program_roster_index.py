@@ -0,0 +1,38 @@
+"""add program roster index
+
+Revision ID: 7b3e5d2c9a14
+Revises: 4f1c2a9d7e01
+Create Date: 2026-10-17 10:41:03.518220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e5d2c9a14'
+down_revision = '4f1c2a9d7e01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination needs a non-null sort key; the client's registration
+    # time is the closest available value for legacy rows
+    op.execute(
+        'UPDATE client_programs SET enrollment_date = '
+        '(SELECT clients.created_at FROM clients WHERE clients.id = client_programs.client_id) '
+        'WHERE enrollment_date IS NULL'
+    )
+    op.execute('UPDATE client_programs SET enrollment_date = CURRENT_TIMESTAMP WHERE enrollment_date IS NULL')
+
+    with op.batch_alter_table('client_programs', schema=None) as batch_op:
+        batch_op.alter_column('enrollment_date', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_client_programs_program_enrollment',
+                              ['program_id', 'enrollment_date', 'client_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('client_programs', schema=None) as batch_op:
+        batch_op.drop_index('ix_client_programs_program_enrollment')
+        batch_op.alter_column('enrollment_date', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,57 @@
+"""add stats rollup tables
+
+Revision ID: c81f04e6b2d7
+Revises: 7b3e5d2c9a14
+Create Date: 2026-10-17 13:05:27.904416
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f04e6b2d7'
+down_revision = '7b3e5d2c9a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('program_stats',
+        sa.Column('program_id', sa.Integer(), nullable=False),
+        sa.Column('enrollment_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['program_id'], ['health_programs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('program_id')
+    )
+    op.create_table('client_demographics',
+        sa.Column('gender', sa.String(length=20), nullable=False),
+        sa.Column('birth_year', sa.Integer(), nullable=False),
+        sa.Column('client_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('gender', 'birth_year')
+    )
+
+    # Seed the rollups from existing data
+    client_programs = sa.table('client_programs', sa.column('program_id'))
+    clients = sa.table('clients', sa.column('gender'), sa.column('date_of_birth'))
+    op.execute(
+        sa.table('program_stats', sa.column('program_id'), sa.column('enrollment_count'))
+        .insert().from_select(
+            ['program_id', 'enrollment_count'],
+            sa.select(client_programs.c.program_id, sa.func.count())
+            .group_by(client_programs.c.program_id)
+        )
+    )
+    gender = sa.func.coalesce(clients.c.gender, '')
+    birth_year = sa.func.coalesce(sa.cast(sa.extract('year', clients.c.date_of_birth), sa.Integer), 0)
+    op.execute(
+        sa.table('client_demographics', sa.column('gender'), sa.column('birth_year'), sa.column('client_count'))
+        .insert().from_select(
+            ['gender', 'birth_year', 'client_count'],
+            sa.select(gender, birth_year, sa.func.count()).group_by(gender, birth_year)
+        )
+    )
+
+
+def downgrade():
+    op.drop_table('client_demographics')
+    op.drop_table('program_stats')
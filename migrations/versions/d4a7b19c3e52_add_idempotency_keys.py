@@ -0,0 +1,36 @@
+"""add idempotency keys
+
+Revision ID: d4a7b19c3e52
+Revises: c81f04e6b2d7
+Create Date: 2026-10-17 15:42:10.318734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7b19c3e52'
+down_revision = 'c81f04e6b2d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_keys',
+        sa.Column('key', sa.String(length=400), nullable=False),
+        sa.Column('fingerprint', sa.String(length=40), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_idempotency_keys_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_idempotency_keys_expires_at'))
+
+    op.drop_table('idempotency_keys')
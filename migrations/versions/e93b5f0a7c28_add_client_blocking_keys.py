@@ -0,0 +1,104 @@
+"""add client blocking keys
+
+Revision ID: e93b5f0a7c28
+Revises: d4a7b19c3e52
+Create Date: 2026-10-17 17:08:51.602118
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93b5f0a7c28'
+down_revision = 'd4a7b19c3e52'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 5000
+
+# Frozen copy of app/normalize.py as of this revision, so later changes to
+# the live helpers don't change what this backfill wrote
+PHONE_KEY_DIGITS = 9
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'), 'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+
+def _normalize_name(value):
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value))
+    return re.sub(r'[^a-z]', '', ''.join(ch for ch in value if not unicodedata.combining(ch)).lower())
+
+
+def _normalize_phone(value):
+    digits = re.sub(r'\D', '', str(value) if value else '')
+    if len(digits) < PHONE_KEY_DIGITS:
+        return None
+    return digits[-PHONE_KEY_DIGITS:]
+
+
+def _soundex(value):
+    name = _normalize_name(value)
+    if not name:
+        return ''
+    code = name[0].upper()
+    previous = _SOUNDEX_CODES.get(name[0], '')
+    for ch in name[1:]:
+        digit = _SOUNDEX_CODES.get(ch, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if ch not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def _blocking_keys(last_name, date_of_birth, phone_number):
+    surname = _soundex(last_name)
+    year = date_of_birth.year if date_of_birth else ''
+    return {
+        'block_key': f'{surname}:{year}' if surname else None,
+        'phone_key': _normalize_phone(phone_number),
+    }
+
+
+def upgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('block_key', sa.String(length=12), nullable=True))
+        batch_op.add_column(sa.Column('phone_key', sa.String(length=15), nullable=True))
+        batch_op.create_index(batch_op.f('ix_clients_block_key'), ['block_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_clients_phone_key'), ['phone_key'], unique=False)
+
+    # Soundex and phone normalization are computed in Python, so backfill in keyset batches
+    clients = sa.table('clients', sa.column('id'), sa.column('last_name'), sa.column('date_of_birth', sa.Date),
+                       sa.column('phone_number'), sa.column('block_key'), sa.column('phone_key'))
+    update = (clients.update().where(clients.c.id == sa.bindparam('_id'))
+              .values(block_key=sa.bindparam('block_key'), phone_key=sa.bindparam('phone_key')))
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(clients.c.id, clients.c.last_name, clients.c.date_of_birth, clients.c.phone_number)
+            .where(clients.c.id > last_id).order_by(clients.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        conn.execute(update, [{'_id': r.id, **_blocking_keys(r.last_name, r.date_of_birth, r.phone_number)}
+                              for r in rows])
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_clients_phone_key'))
+        batch_op.drop_index(batch_op.f('ix_clients_block_key'))
+        batch_op.drop_column('phone_key')
+        batch_op.drop_column('block_key')
@@ -0,0 +1,75 @@
+"""add updated_at columns and tombstones for the change feed
+
+Revision ID: f1c6d83a5b90
+Revises: e93b5f0a7c28
+Create Date: 2026-10-17 18:31:44.120593
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6d83a5b90'
+down_revision = 'e93b5f0a7c28'
+branch_labels = None
+depends_on = None
+
+# table -> (column the backfill copies from, index name, index columns)
+UPDATED_AT = {
+    'clients': ('created_at', 'ix_clients_updated', ['updated_at', 'id']),
+    'health_programs': ('created_at', 'ix_health_programs_updated', ['updated_at', 'id']),
+    'client_programs': ('enrollment_date', 'ix_client_programs_updated', ['updated_at', 'client_id', 'program_id']),
+}
+
+# Frozen copy of the FTS5 sync triggers 4f1c2a9d7e01 creates. On SQLite,
+# altering a column rebuilds the clients table, which drops its triggers.
+SQLITE_SEARCH_TRIGGERS = [
+    'CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN '
+    'INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END',
+    'CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN '
+    "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    'CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE OF search_text ON clients BEGIN '
+    "INSERT INTO clients_fts(clients_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    'INSERT INTO clients_fts(rowid, search_text) VALUES (new.id, new.search_text); END',
+]
+
+
+def _restore_search_triggers():
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_SEARCH_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade():
+    for table, (source, index, columns) in UPDATED_AT.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {table} SET updated_at = COALESCE({source}, CURRENT_TIMESTAMP)')
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+            batch_op.create_index(index, columns, unique=False)
+    _restore_search_triggers()
+
+    op.create_table('tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('related_id', sa.Integer(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_tombstones_deleted', ['deleted_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_tombstones_deleted')
+    op.drop_table('tombstones')
+
+    for table, (_, index, _) in UPDATED_AT.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(index)
+            batch_op.drop_column('updated_at')
+    _restore_search_triggers()
@@ -0,0 +1,13 @@
+import pytest
+from app import create_app
+
+
+@pytest.fixture
+def app():
+    return create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'METRICS_ENABLED': True,
+                       'METRICS_SERVER_TIMING': True, 'SLOW_REQUEST_MS': 0})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,36 @@
+from bench.datagen import generate
+
+
+def _batch(client, *requests):
+    response = client.post('/batch', json={'requests': list(requests)})
+    assert response.status_code == 200
+    return response.get_json()['responses']
+
+
+def test_sub_requests_ignore_accept_encoding(app, client):
+    with app.app_context():
+        generate(clients=300, programs=3, seed=2)
+    page, ndjson = _batch(
+        client,
+        {'path': '/clients?limit=100', 'headers': {'Accept-Encoding': 'gzip'}},
+        {'path': '/clients?limit=100&format=ndjson', 'headers': {'Accept-Encoding': 'gzip'}},
+    )
+    assert page['status'] == 200
+    assert len(page['body']['clients']) == 100
+    assert ndjson['status'] == 400
+
+
+def test_streamed_endpoints_are_rejected_per_item(app, client):
+    with app.app_context():
+        generate(clients=20, programs=3, seed=2)
+    streamed, page = _batch(client, {'path': '/clients'}, {'path': '/programs'})
+    assert streamed['status'] == 400
+    assert page['status'] == 200
+
+
+def test_sub_request_queries_count_toward_the_batch(app, client):
+    with app.app_context():
+        generate(clients=20, programs=3, seed=2)
+    response = client.post('/batch', json={'requests': [{'path': '/clients/1'}, {'path': '/programs/1'}]})
+    timing = response.headers['Server-Timing']
+    assert 'desc="0 queries"' not in timing
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+import pytest
+from app.idempotency import idempotency
+from app.models import db, Client, IdempotencyKey
+
+KEY = 'POST /clients k1'
+BODY = {'first_name': 'Amina', 'last_name': 'Kamau'}
+
+
+def _post(client):
+    return client.post('/clients', json=BODY, headers={'Idempotency-Key': 'k1'})
+
+
+def _row(app):
+    with app.app_context():
+        return db.session.get(IdempotencyKey, KEY)
+
+
+def test_retry_replays_the_stored_response(client):
+    first = _post(client)
+    retry = _post(client)
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+
+
+def test_abandoned_reservation_is_taken_over_after_its_lease(app, client):
+    with app.app_context():
+        db.session.add(IdempotencyKey(key=KEY, fingerprint='x', expires_at=datetime.now() + timedelta(seconds=60)))
+        db.session.commit()
+    assert _post(client).status_code == 409
+
+    with app.app_context():
+        db.session.execute(db.update(IdempotencyKey).values(expires_at=datetime.now() - timedelta(seconds=1)))
+        db.session.commit()
+    assert _post(client).status_code == 201
+    assert _row(app).expires_at > datetime.now() + timedelta(hours=23)
+
+
+def test_committed_write_is_not_repeated_when_the_response_is_lost(app):
+    def view():
+        db.session.add(Client(first_name='Amina', last_name='Kamau'))
+        db.session.commit()
+        raise RuntimeError('worker died before storing the response')
+
+    with app.test_request_context('/clients', method='POST'):
+        with pytest.raises(RuntimeError):
+            idempotency.handle(KEY, 'fp', view)
+
+    row = _row(app)
+    assert row.status_code is None
+    # The commit turned the lease into a full reservation
+    assert row.expires_at > datetime.now() + timedelta(seconds=app.config['IDEMPOTENCY_LEASE'])
+    with app.test_request_context('/clients', method='POST'):
+        response = idempotency.handle(KEY, 'fp', lambda: pytest.fail('view ran twice'))
+        assert response[1] == 409
+
+
+def test_failed_view_releases_the_key(app):
+    def view():
+        raise RuntimeError('failed before writing')
+
+    with app.test_request_context('/clients', method='POST'):
+        with pytest.raises(RuntimeError):
+            idempotency.handle(KEY, 'fp', view)
+    assert _row(app) is None
@@ -0,0 +1,17 @@
+import json
+from datetime import date
+
+
+def test_non_string_keys_serialize_like_the_stdlib(app):
+    payload = {'by_year': {1990: 2, 2001: 1}, 'flags': {True: 'yes'}, 'ratio': {0.5: 'half'}}
+    assert json.loads(app.json.dumps(payload)) == json.loads(json.dumps(payload))
+
+
+def test_date_keys_serialize_as_iso_strings(app):
+    assert json.loads(app.json.dumps({date(2026, 1, 31): 3})) == {'2026-01-31': 3}
+
+
+def test_response_accepts_non_string_keys(app):
+    with app.test_request_context():
+        response = app.json.response({7: 'seven'})
+    assert json.loads(response.get_data()) == {'7': 'seven'}
@@ -0,0 +1,46 @@
+from app.models import db, Client
+from bench.datagen import generate
+
+
+def _seed(app, clients):
+    with app.app_context():
+        generate(clients=clients, programs=3, seed=5)
+
+
+def test_streamed_responses_stay_streamed(app):
+    _seed(app, 20)
+    for path in ('/clients', '/exports/clients.csv', '/exports/clients.ndjson'):
+        with app.test_request_context(path):
+            app.preprocess_request()
+            response = app.process_response(app.make_response(app.dispatch_request()))
+            assert response.is_streamed, path
+            assert 'Content-Length' not in response.headers
+            b''.join(response.response)
+            response.close()
+
+
+def test_streamed_request_metrics_cover_the_body(app, client):
+    _seed(app, 1200)
+    with app.app_context():
+        total = db.session.execute(db.select(db.func.count()).select_from(Client)).scalar()
+
+    response = client.get('/clients')
+    body = response.get_data()
+    response.close()
+
+    assert len(response.get_json()) == total
+    metrics = app.extensions['metrics']
+    key = ('client_bp.list_clients', 'GET')
+    # Version check, then a page query and its program load per streamed chunk
+    assert metrics.sql_queries[key] > 3
+    assert metrics.response_bytes[key] == len(body)
+
+
+def test_failed_statements_leave_no_start_time(app):
+    with app.app_context():
+        for _ in range(3):
+            try:
+                db.session.execute(db.text('SELECT * FROM missing_table'))
+            except Exception:
+                db.session.rollback()
+        assert db.session.connection().info.get('query_start_time') == []
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import pytest
+from flask_migrate import Migrate, upgrade
+from app import create_app
+from app.models import db
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+LEGACY_SCHEMA = """
+CREATE TABLE health_programs (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL UNIQUE,
+  description TEXT, created_at DATETIME);
+CREATE TABLE clients (id INTEGER PRIMARY KEY, full_name VARCHAR(100) NOT NULL, national_id VARCHAR(20) NOT NULL,
+  date_of_birth DATE NOT NULL, CONSTRAINT clients_national_id_key UNIQUE (national_id));
+CREATE TABLE client_programs (client_id INTEGER NOT NULL REFERENCES clients(id),
+  program_id INTEGER NOT NULL REFERENCES health_programs(id),
+  enrollment_date DATETIME, notes TEXT, PRIMARY KEY (client_id, program_id));
+"""
+
+ROWS = """
+INSERT INTO health_programs VALUES (1, 'TB', 'tb', '2024-01-01 00:00:00'), (2, 'HIV', NULL, '2024-01-01 00:00:00');
+INSERT INTO clients (id, first_name, last_name, date_of_birth, phone_number, email, created_at)
+VALUES (1, 'Amina', 'Kamau', '1990-05-01', '0712345678', 'a@x.org', '2024-01-02 00:00:00'),
+       (2, 'Brian', 'Otieno', NULL, NULL, '', '2024-01-03 00:00:00');
+INSERT INTO client_programs VALUES (1, 1, NULL, NULL), (1, 2, '2024-02-01 00:00:00', 'x'), (2, 1, NULL, NULL);
+"""
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    """A legacy SQLite database with rows, upgraded to head."""
+    path = str(tmp_path / 'legacy.db')
+    with sqlite3.connect(path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'DB_CREATE_ALL': False})
+    Migrate(app, db, directory=MIGRATIONS)
+    with app.app_context():
+        # The baseline adds NOT NULL columns, so it only applies to empty tables
+        upgrade(revision='bcdfcaa22188')
+        with sqlite3.connect(path) as conn:
+            conn.executescript(ROWS)
+        upgrade()
+    return app, path
+
+
+def test_upgrade_keeps_search_triggers(migrated):
+    app, path = migrated
+    with sqlite3.connect(path) as conn:
+        triggers = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert triggers == {'clients_fts_ai', 'clients_fts_ad', 'clients_fts_au'}
+
+    client = app.test_client()
+    assert client.post('/clients', json={'first_name': 'Zawadi', 'last_name': 'Wafula'}).status_code == 201
+    assert [c['first_name'] for c in client.get('/clients/search?q=zawadi').get_json()] == ['Zawadi']
+    assert [c['first_name'] for c in client.get('/clients/search?q=amina').get_json()] == ['Amina']
+
+
+def test_upgrade_backfills_blocking_keys(migrated):
+    _, path = migrated
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute('SELECT id, block_key, phone_key, email FROM clients ORDER BY id').fetchall()
+    assert rows == [(1, 'K500:1990', '712345678', 'a@x.org'), (2, 'O350:', None, None)]
@@ -0,0 +1,104 @@
+"""SQL statement budgets for the client and program write paths.
+
+Every case issues one request against a freshly seeded database and reads
+the statement count from the ``Server-Timing`` header that ``app.metrics``
+adds when METRICS_SERVER_TIMING is on.
+"""
+import re
+import pytest
+from app.models import db, Client, HealthProgram
+from bench.datagen import generate
+
+QUERY_BUDGET = 3
+
+# Endpoints allowed more than QUERY_BUDGET, with every statement they issue.
+# Their budget is the length of the list, so a path can only grow by naming
+# the new statement here.
+BUDGET_EXCEPTIONS = {
+    'update fields and programs': (
+        'select the client with its programs',
+        'look up the requested programs',
+        'update the client row',
+        'delete removed enrollments',
+        'tombstone removed enrollments for the change feed',
+        'insert added enrollments',
+        'upsert the program enrollment rollup',
+        'upsert the client demographics rollup',
+    ),
+    'delete client': (
+        'delete enrollments, returning their programs',
+        'upsert the program enrollment rollup',
+        'delete the client, returning its demographics',
+        'upsert the client demographics rollup',
+        'tombstone the client for the change feed',
+    ),
+    'delete program': (
+        'delete the program\'s enrollments',
+        'delete its enrollment rollup row',
+        'delete the program, returning its id',
+        'tombstone the program for the change feed',
+    ),
+}
+
+# (description, setup request or None, method, path, json body, expected status)
+CASES = [
+    ('enroll in one program', None, 'POST', '/clients/{client}/programs/{free}', None, 200),
+    ('enroll again (no-op)', ('POST', '/clients/{client}/programs/{free}'),
+     'POST', '/clients/{client}/programs/{free}', None, 200),
+    ('enroll unknown client', None, 'POST', '/clients/999999/programs/{free}', None, 404),
+    ('enroll unknown program', None, 'POST', '/clients/{client}/programs/999999', None, 404),
+    ('remove enrollment', ('POST', '/clients/{client}/programs/{free}'),
+     'DELETE', '/clients/{client}/programs/{free}', None, 200),
+    ('remove missing enrollment', None, 'DELETE', '/clients/{client}/programs/{free}', None, 404),
+    ('remove unknown client', None, 'DELETE', '/clients/999999/programs/{free}', None, 404),
+    ('enroll in many programs', None, 'POST', '/clients/{client}/enroll', {'program_ids': '{all}'}, 200),
+    ('enroll many, unknown client', None, 'POST', '/clients/999999/enroll', {'program_ids': '{all}'}, 404),
+    ('update fields only', None, 'PUT', '/clients/{client}', {'first_name': 'Budget', 'gender': 'Other'}, 200),
+    ('update fields and programs', None, 'PUT', '/clients/{client}',
+     {'last_name': 'Check', 'date_of_birth': '1990-01-01', 'programs': '{first}'}, 200),
+    ('update unknown client', None, 'PUT', '/clients/999999', {'first_name': 'X'}, 404),
+    ('delete client', None, 'DELETE', '/clients/{client}', None, 200),
+    ('delete unknown client', None, 'DELETE', '/clients/999999', None, 404),
+    ('delete program', None, 'DELETE', '/programs/{free}', None, 200),
+    ('delete unknown program', None, 'DELETE', '/programs/999999', None, 404),
+]
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def _fill(value, ids):
+    if isinstance(value, str):
+        if value in ('{all}', '{first}'):
+            return ids[value[1:-1]]
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {k: _fill(v, ids) for k, v in value.items()}
+    return value
+
+
+@pytest.fixture
+def ids(app):
+    with app.app_context():
+        generate(clients=50, programs=5, seed=7)
+        program_ids = db.session.execute(db.select(HealthProgram.id).order_by(HealthProgram.id)).scalars().all()
+        client = db.session.execute(db.select(Client).order_by(Client.id)).scalar()
+        enrolled = {p.id for p in client.programs}
+        free = next(pid for pid in program_ids if pid not in enrolled)
+        return {'client': client.id, 'free': free, 'all': program_ids, 'first': program_ids[:1]}
+
+
+def test_exceptions_name_real_cases():
+    assert BUDGET_EXCEPTIONS.keys() <= {case[0] for case in CASES}
+
+
+@pytest.mark.parametrize('description, setup, method, path, body, status', CASES, ids=[c[0] for c in CASES])
+def test_query_budget(client, ids, description, setup, method, path, body, status):
+    if setup:
+        client.open(_fill(setup[1], ids), method=setup[0])
+    response = client.open(_fill(path, ids), method=method, json=_fill(body, ids))
+    assert response.status_code == status
+
+    match = _QUERIES.search(response.headers.get('Server-Timing', ''))
+    assert match, 'Server-Timing header missing'
+    budget = len(BUDGET_EXCEPTIONS.get(description, ())) or QUERY_BUDGET
+    assert int(match.group(1)) <= budget